@@ -0,0 +1,745 @@
+"""
+Benchmarks for the hot paths of qasync, compared with a plain asyncio loop.
+
+Run with `python benchmarks/bench.py`, see benchmarks/README.md for the options.
+
+BSD License
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BINDINGS = ("PyQt6", "PyQt5", "PySide6", "PySide2")
+
+# name -> (function, loop kinds it runs on)
+BENCHMARKS = {}
+
+
+def benchmark(*kinds):
+    """Register a benchmark for the given loop kinds, both by default."""
+    kinds = kinds or ("qasync", "asyncio")
+
+    def decorator(fn):
+        BENCHMARKS[fn.__name__[len("bench_") :]] = (fn, kinds)
+        return fn
+
+    return decorator
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def _application():
+    import qasync
+
+    return qasync.QApplication.instance() or qasync.QApplication([])
+
+
+def _new_loop(kind):
+    if kind == "asyncio":
+        return asyncio.new_event_loop()
+    import qasync
+
+    # "qprocess" is a QEventLoop running subprocesses with QProcess, "qevent"
+    # one woken from other threads by posted events
+    return qasync.QEventLoop(
+        _application(),
+        use_qprocess=kind == "qprocess",
+        threadsafe_wakeup="event" if kind == "qevent" else "signal",
+    )
+
+
+@benchmark()
+def bench_call_soon(loop, scale):
+    """Throughput of a burst of call_soon callbacks."""
+    n = int(100_000 * scale)
+
+    async def main():
+        done = loop.create_future()
+        count = 0
+
+        def callback():
+            nonlocal count
+            count += 1
+            if count == n:
+                done.set_result(None)
+
+        t0 = time.perf_counter()
+        for _ in range(n):
+            loop.call_soon(callback)
+        await done
+        return time.perf_counter() - t0
+
+    dt = loop.run_until_complete(main())
+    return {"callbacks_per_s": n / dt}
+
+
+@benchmark()
+def bench_sleep0(loop, scale):
+    """Cost of yielding to the loop with asyncio.sleep(0)."""
+    n = int(50_000 * scale)
+
+    async def main():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await asyncio.sleep(0)
+        return time.perf_counter() - t0
+
+    dt = loop.run_until_complete(main())
+    return {"yields_per_s": n / dt}
+
+
+@benchmark()
+def bench_yield_now(loop, scale):
+    """Cost of yielding to the loop with qasync.yield_now()."""
+    import qasync
+
+    n = int(50_000 * scale)
+
+    async def main():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await qasync.yield_now()
+        return time.perf_counter() - t0
+
+    dt = loop.run_until_complete(main())
+    return {"yields_per_s": n / dt}
+
+
+@benchmark()
+def bench_call_later(loop, scale):
+    """Accuracy and jitter of call_later timers."""
+    n = max(10, int(200 * scale))
+    delay = 0.005
+
+    async def main():
+        lateness = []
+        for _ in range(n):
+            fired = loop.create_future()
+            scheduled = time.perf_counter() + delay
+            loop.call_later(delay, lambda f=fired: f.set_result(time.perf_counter()))
+            lateness.append(await fired - scheduled)
+        return lateness
+
+    lateness = [dt * 1000 for dt in loop.run_until_complete(main())]
+    return {
+        "late_mean_ms": statistics.mean(lateness),
+        "late_p50_ms": _percentile(lateness, 50),
+        "late_p99_ms": _percentile(lateness, 99),
+        "jitter_ms": statistics.pstdev(lateness),
+    }
+
+
+@benchmark()
+def bench_schedule(loop, scale):
+    """Cost of scheduling a callback with call_soon and call_later."""
+    n = int(50_000 * scale)
+
+    def callback():
+        pass
+
+    async def main():
+        results = {}
+        for name, delay in (("call_soon", None), ("call_later", 3600)):
+            handles = []
+            t0 = time.perf_counter_ns()
+            if delay is None:
+                for _ in range(n):
+                    handles.append(loop.call_soon(callback))
+            else:
+                for _ in range(n):
+                    handles.append(loop.call_later(delay, callback))
+            results[f"{name}_ns"] = (time.perf_counter_ns() - t0) / n
+            for handle in handles:
+                handle.cancel()
+            await asyncio.sleep(0)
+        return results
+
+    return loop.run_until_complete(main())
+
+
+@benchmark("qasync", "qevent", "asyncio")
+def bench_call_soon_threadsafe(loop, scale):
+    """Rate of callbacks posted from another thread, and latency of a wakeup."""
+    n = int(20_000 * scale)
+
+    async def main():
+        done = loop.create_future()
+        count = 0
+
+        def callback():
+            nonlocal count
+            count += 1
+            if count == n:
+                done.set_result(None)
+
+        def producer():
+            for _ in range(n):
+                loop.call_soon_threadsafe(callback)
+
+        t0 = time.perf_counter()
+        thread = threading.Thread(target=producer)
+        thread.start()
+        await done
+        thread.join()
+        return time.perf_counter() - t0
+
+    async def wakeups():
+        woken = threading.Event()
+        latencies = []
+
+        def ping():
+            for _ in range(n // 20):
+                woken.clear()
+                t0 = time.perf_counter()
+                loop.call_soon_threadsafe(woken.set)
+                woken.wait()
+                latencies.append(time.perf_counter() - t0)
+
+        thread = threading.Thread(target=ping)
+        thread.start()
+        while thread.is_alive():
+            await asyncio.sleep(0.01)
+        return latencies
+
+    dt = loop.run_until_complete(main())
+    latencies = loop.run_until_complete(wakeups())
+    return {
+        "callbacks_per_s": n / dt,
+        "wakeup_p50_us": _percentile(latencies, 50) * 1e6,
+        "wakeup_p99_us": _percentile(latencies, 99) * 1e6,
+    }
+
+
+@benchmark()
+def bench_thread_queue(loop, scale):
+    """Rate of items passed from another thread through a ThreadSafeQueue."""
+    import qasync
+
+    n = int(100_000 * scale)
+
+    async def main(maxsize):
+        queue = qasync.ThreadSafeQueue(maxsize)
+
+        def producer():
+            for i in range(n):
+                queue.put(i)
+
+        t0 = time.perf_counter()
+        thread = threading.Thread(target=producer)
+        thread.start()
+        received = 0
+        while received < n:
+            received += len(await queue.get_batch())
+        thread.join()
+        return n / (time.perf_counter() - t0), queue.wakeups / n
+
+    rate, wakeups = loop.run_until_complete(main(0))
+    bounded_rate, bounded_wakeups = loop.run_until_complete(main(1000))
+    return {
+        "items_per_s": rate,
+        "wakeups_per_item": wakeups,
+        "bounded_items_per_s": bounded_rate,
+        "bounded_wakeups_per_item": bounded_wakeups,
+    }
+
+
+@benchmark()
+def bench_socket_echo(loop, scale):
+    """Throughput and round-trip latency over a socket pair with streams."""
+    total = int(32 * 2**20 * scale)
+    chunk = 64 * 2**10
+    pings = int(2_000 * scale)
+
+    async def main():
+        a, b = socket.socketpair()
+        reader_a, writer_a = await asyncio.open_connection(sock=a)
+        reader_b, writer_b = await asyncio.open_connection(sock=b)
+
+        async def echo():
+            while True:
+                data = await reader_b.read(chunk)
+                if not data:
+                    break
+                writer_b.write(data)
+                await writer_b.drain()
+
+        echo_task = asyncio.ensure_future(echo())
+
+        t0 = time.perf_counter()
+        for _ in range(pings):
+            writer_a.write(b"x")
+            await reader_a.readexactly(1)
+        latency = (time.perf_counter() - t0) / pings
+
+        async def send():
+            payload = b"x" * chunk
+            for _ in range(total // chunk):
+                writer_a.write(payload)
+                await writer_a.drain()
+
+        t0 = time.perf_counter()
+        sender = asyncio.ensure_future(send())
+        await reader_a.readexactly(total // chunk * chunk)
+        await sender
+        throughput = total / (time.perf_counter() - t0)
+
+        writer_a.close()
+        await echo_task
+        writer_b.close()
+        return latency, throughput
+
+    latency, throughput = loop.run_until_complete(main())
+    return {"round_trip_us": latency * 1e6, "throughput_mb_per_s": throughput / 2**20}
+
+
+@benchmark("qasync", "qevent", "asyncio")
+def bench_run_in_executor(loop, scale):
+    """Round trip of a no-op job through the default executor."""
+    n = int(2_000 * scale)
+
+    async def main():
+        await loop.run_in_executor(None, int)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            await loop.run_in_executor(None, int)
+        return (time.perf_counter() - t0) / n
+
+    return {"round_trip_us": loop.run_until_complete(main()) * 1e6}
+
+
+@benchmark()
+def bench_resolve_under_load(loop, scale):
+    """Latency of getaddrinfo() while the default executor is saturated."""
+    n = max(3, int(20 * scale))
+
+    async def main():
+        latencies = []
+        for _ in range(n):
+            # more blocking jobs than any default executor has workers
+            jobs = [loop.run_in_executor(None, time.sleep, 0.01) for _ in range(64)]
+            t0 = time.perf_counter()
+            await loop.getaddrinfo("127.0.0.1", 80)
+            latencies.append(time.perf_counter() - t0)
+            await asyncio.gather(*jobs)
+        return latencies
+
+    return {"resolve_ms": statistics.median(loop.run_until_complete(main())) * 1000}
+
+
+@benchmark("qasync")
+def bench_async_slot(loop, scale):
+    """Cost of dispatching a signal to an asyncSlot and running it."""
+    import qasync
+
+    n = int(10_000 * scale)
+
+    async def main():
+        done = loop.create_future()
+        count = 0
+
+        @qasync.asyncSlot()
+        async def slot():
+            nonlocal count
+            count += 1
+            if count == n:
+                done.set_result(None)
+
+        signaller = qasync._make_signaller(qasync.QtCore)
+        signaller.signal.connect(slot)
+        t0 = time.perf_counter()
+        for _ in range(n):
+            signaller.signal.emit()
+        await done
+        return (time.perf_counter() - t0) / n
+
+    return {"dispatch_us": loop.run_until_complete(main()) * 1e6}
+
+
+@benchmark("qasync", "qprocess", "asyncio")
+def bench_subprocess(loop, scale):
+    """Spawn and reap latency of a trivial subprocess."""
+    n = max(5, int(50 * scale))
+    program = shutil.which("true")
+    args = [program] if program else [sys.executable, "-c", "pass"]
+
+    async def main():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            process = await asyncio.create_subprocess_exec(*args)
+            await process.wait()
+        return (time.perf_counter() - t0) / n
+
+    return {"spawn_ms": loop.run_until_complete(main()) * 1000}
+
+
+@benchmark("qasync", "qprocess", "asyncio")
+def bench_subprocess_communicate(loop, scale):
+    """Round trip of data through the pipes of a short-lived subprocess."""
+    n = max(5, int(50 * scale))
+    program = shutil.which("cat")
+    copy = "import shutil, sys; shutil.copyfileobj(sys.stdin.buffer, sys.stdout.buffer)"
+    args = [program] if program else [sys.executable, "-c", copy]
+    payload = b"x" * 2**16
+
+    async def main():
+        t0 = time.perf_counter()
+        for _ in range(n):
+            process = await asyncio.create_subprocess_exec(
+                *args, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            )
+            stdout, _ = await process.communicate(payload)
+            assert stdout == payload
+        return (time.perf_counter() - t0) / n
+
+    return {"communicate_ms": loop.run_until_complete(main()) * 1000}
+
+
+@benchmark("qasync")
+def bench_idle_wakeups(loop, scale):
+    """Timer wakeups and CPU time of an idle app with many periodic tasks."""
+    duration = 2 * scale
+    periods = [0.1 + 0.0137 * i for i in range(20)]
+
+    async def tick(period):
+        while True:
+            await asyncio.sleep(period)
+
+    async def main():
+        tasks = [asyncio.ensure_future(tick(period)) for period in periods]
+        await asyncio.sleep(0)
+        wakeups = loop.get_batch_stats()["timer_wakeups"]
+        cpu = time.process_time()
+        await asyncio.sleep(duration)
+        wakeups = loop.get_batch_stats()["timer_wakeups"] - wakeups
+        cpu = time.process_time() - cpu
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return wakeups / duration, cpu / duration * 1000
+
+    results = {}
+    for slack in (0, 0.05):
+        loop._timer.slack = slack
+        wakeups, cpu = loop.run_until_complete(main())
+        prefix = f"slack_{int(slack * 1000)}ms_" if slack else ""
+        results[f"{prefix}wakeups_per_s"] = wakeups
+        results[f"{prefix}cpu_ms_per_s"] = cpu
+    return results
+
+
+@benchmark()
+def bench_stream_receive(loop, scale):
+    """Receiving a bulk stream with data_received() and into pooled buffers."""
+    import qasync
+
+    total = int(64 * 2**20 * scale)
+    chunk = b"x" * 2**16
+
+    class Receiver(asyncio.Protocol):
+        def __init__(self):
+            self.received = 0
+            self.done = loop.create_future()
+
+        def data_received(self, data):
+            self.received += len(data)
+
+        def connection_lost(self, exc):
+            self.done.set_result(self.received)
+
+    class PooledReceiver(qasync.PooledBufferedProtocol):
+        def __init__(self, pool):
+            super().__init__(pool)
+            self.received = 0
+            self.done = loop.create_future()
+
+        def data_received_into(self, view):
+            self.received += len(view)
+
+        def connection_lost(self, exc):
+            super().connection_lost(exc)
+            self.done.set_result(self.received)
+
+    async def main(receiver):
+        send_sock, recv_sock = socket.socketpair()
+
+        def send():
+            with send_sock:
+                for _ in range(total // len(chunk)):
+                    send_sock.sendall(chunk)
+
+        await loop.connect_accepted_socket(lambda: receiver, recv_sock)
+        sender = threading.Thread(target=send)
+        t0 = time.perf_counter()
+        sender.start()
+        received = await receiver.done
+        elapsed = time.perf_counter() - t0
+        sender.join()
+        return received / 2**20 / elapsed
+
+    pool = qasync.BufferPool(2**18)
+    return {
+        "mb_per_s": loop.run_until_complete(main(Receiver())),
+        "pooled_mb_per_s": loop.run_until_complete(main(PooledReceiver(pool))),
+    }
+
+
+@benchmark("qasync")
+def bench_datagram_flood(loop, scale):
+    """Receiving a flood of small datagrams, with read draining and batching."""
+    import qasync
+
+    n = int(20000 * scale)
+    payload = b"x" * 1024
+
+    dispatches = [0]
+    add_callback = loop._add_callback
+
+    def counting_add_callback(handle, *args, **kwargs):
+        # a notifier handle is queued once for every activation of a notifier
+        if isinstance(handle, qasync._NotifierHandle):
+            dispatches[0] += 1
+        return add_callback(handle, *args, **kwargs)
+
+    loop._add_callback = counting_add_callback
+
+    class Receiver(asyncio.DatagramProtocol):
+        def datagram_received(self, data, addr):
+            self.count += 1
+            if self.count == n:
+                self.done.set_result(None)
+
+    class BatchReceiver(Receiver):
+        def datagrams_received(self, datagrams):
+            self.count += len(datagrams)
+            if self.count == n:
+                self.done.set_result(None)
+
+    async def main(receiver):
+        send_sock, recv_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.count = 0
+        receiver.done = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: receiver, sock=recv_sock
+        )
+
+        def send():
+            # blocks while the receive buffer is full, so nothing is dropped
+            for _ in range(n):
+                send_sock.send(payload)
+
+        sender = threading.Thread(target=send)
+        dispatches[0] = 0
+        t0 = time.perf_counter()
+        sender.start()
+        await receiver.done
+        elapsed = time.perf_counter() - t0
+        sender.join()
+        transport.close()
+        send_sock.close()
+        return n / elapsed, dispatches[0] / (n * len(payload) / 2**20)
+
+    results = {}
+    for prefix, drain, batch in (
+        ("", False, None),
+        ("drained_", True, None),
+        ("batched_", False, 64),
+    ):
+        loop.set_read_draining(drain)
+        loop._QEventLoop__datagram_batch = batch
+        receiver = BatchReceiver() if batch else Receiver()
+        rate, per_mb = loop.run_until_complete(main(receiver))
+        results[f"{prefix}datagrams_per_s"] = rate
+        results[f"{prefix}dispatches_per_mb"] = per_mb
+    return results
+
+
+def bench_startup(kind, scale):
+    """Creating a loop, running a trivial coroutine and closing the loop."""
+    n = int(200 * scale)
+
+    async def noop():
+        pass
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        loop = _new_loop(kind)
+        loop.run_until_complete(noop())
+        loop.close()
+    return {"cycle_us": (time.perf_counter() - t0) / n * 1e6}
+
+
+def bench_import(kind, scale):
+    """Time and memory of a fresh interpreter importing the loop's module."""
+    n = max(3, int(10 * scale))
+    code = (
+        f"import time, resource, sys; t0 = time.perf_counter(); import {kind}; "
+        "print(time.perf_counter() - t0, "
+        "resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "
+        "sum(name.endswith('.QtWidgets') for name in sys.modules))"
+    )
+    times = []
+    for _ in range(n):
+        out = subprocess.run(
+            [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE
+        ).stdout.split()
+        times.append(float(out[0]))
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    rss = int(out[1]) / (2**20 if sys.platform == "darwin" else 2**10)
+    return {
+        "import_ms": statistics.median(times) * 1000,
+        "max_rss_mb": rss,
+        "qtwidgets_loaded": int(out[2]),
+    }
+
+
+# benchmarks which create their own loops or processes, name -> function(kind, scale)
+STANDALONE = {"startup": bench_startup, "import": bench_import}
+# benchmarks needing the POSIX resource module or AF_UNIX datagram sockets
+POSIX_ONLY = {"import", "datagram_flood"}
+
+
+def _run_benchmarks(names, scale):
+    results = {}
+    for name in names:
+        if name in POSIX_ONLY and sys.platform == "win32":
+            continue
+        if name in STANDALONE:
+            results[name] = {
+                kind: STANDALONE[name](kind, scale) for kind in ("qasync", "asyncio")
+            }
+            continue
+        fn, kinds = BENCHMARKS[name]
+        results[name] = {}
+        for kind in kinds:
+            loop = _new_loop(kind)
+            asyncio.set_event_loop(loop)
+            try:
+                results[name][kind] = fn(loop, scale)
+            finally:
+                asyncio.set_event_loop(None)
+                loop.close()
+    return results
+
+
+def _meta():
+    import qasync
+
+    return {
+        "binding": qasync.qt_flavor,
+        "qt_version": qasync.QtCore.qVersion(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def _lower_is_better(metric):
+    # rates are higher is better, except for the costs of an idle loop
+    return not metric.endswith("_per_s") or "wakeups" in metric or "cpu_" in metric
+
+
+def compare(baseline, current, tolerance):
+    """Return the qasync metrics which regressed by more than tolerance."""
+    regressions = []
+    for binding, run in current.items():
+        base_run = baseline.get(binding)
+        if base_run is None:
+            continue
+        for name, kinds in run["results"].items():
+            base = base_run["results"].get(name, {}).get("qasync", {})
+            for metric, value in kinds.get("qasync", {}).items():
+                old = base.get(metric)
+                if not old:
+                    continue
+                change = (value - old) / old
+                if not _lower_is_better(metric):
+                    change = -change
+                if change > tolerance:
+                    regressions.append((binding, name, metric, old, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("names", nargs="*", help="benchmarks to run, default all")
+    parser.add_argument(
+        "--bindings",
+        help="comma separated Qt bindings to run, 'all' for every installed one, "
+        "default the one qasync picks",
+    )
+    parser.add_argument("--scale", type=float, default=1.0, help="workload multiplier")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as regression, default 0.2",
+    )
+    args = parser.parse_args(argv)
+
+    names = args.names or [*BENCHMARKS, *STANDALONE]
+    unknown = set(names) - set(BENCHMARKS) - set(STANDALONE)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    if args.bindings:
+        if args.bindings == "all":
+            bindings = [b for b in BINDINGS if importlib.util.find_spec(b)]
+        else:
+            bindings = args.bindings.split(",")
+        results = {}
+        for binding in bindings:
+            # each binding needs its own process, they cannot be mixed
+            out = subprocess.run(
+                [sys.executable, __file__, *names, "--scale", str(args.scale)],
+                env={**os.environ, "QT_API": binding},
+                check=True,
+                stdout=subprocess.PIPE,
+            ).stdout
+            results.update(json.loads(out))
+    else:
+        meta = _meta()
+        results = {
+            meta["binding"]: {
+                "meta": meta,
+                "results": _run_benchmarks(names, args.scale),
+            }
+        }
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for binding, name, metric, old, new in regressions:
+            print(
+                f"REGRESSION {binding} {name}.{metric}: {old:.4g} -> {new:.4g}",
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
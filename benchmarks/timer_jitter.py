@@ -0,0 +1,234 @@
+"""
+Harness recording how accurately timers fire, for qasync and plain asyncio.
+
+Run with `python benchmarks/timer_jitter.py`, see benchmarks/README.md for the
+options.
+
+BSD License
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+KINDS = ("qasync", "asyncio")
+TIMER_TYPES = ("precise", "coarse", "very_coarse")
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def _new_loop(kind, timer_type):
+    if kind == "asyncio":
+        return asyncio.new_event_loop()
+    import qasync
+
+    app = qasync.QApplication.instance() or qasync.QApplication([])
+    return qasync.QEventLoop(app, timer_type=timer_type)
+
+
+async def _sample_call_later(loop, delay):
+    fired = loop.create_future()
+    scheduled = loop.time() + delay
+    loop.call_later(delay, lambda: fired.set_result(loop.time()))
+    return await fired - scheduled
+
+
+async def _sample_call_at(loop, delay):
+    fired = loop.create_future()
+    scheduled = loop.time() + delay
+    loop.call_at(scheduled, lambda: fired.set_result(loop.time()))
+    return await fired - scheduled
+
+
+async def _sample_sleep(loop, delay):
+    scheduled = loop.time() + delay
+    await asyncio.sleep(delay)
+    return loop.time() - scheduled
+
+
+SOURCES = {
+    "call_later": _sample_call_later,
+    "call_at": _sample_call_at,
+    "sleep": _sample_sleep,
+}
+
+
+async def _loop_load(load, period=0.001):
+    """Keep the loop busy for a `load` fraction of the time."""
+    busy = period * load
+    while True:
+        end = time.perf_counter() + busy
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(period - busy)
+
+
+def _thread_load(stopping):
+    """Compete for the GIL from another thread."""
+    while not stopping.is_set():
+        sum(range(1000))
+
+
+def measure(kind, source, delay, samples, timer_type=None, load=0.0, threads=0):
+    """
+    Return the lateness of `samples` timers in seconds.
+
+    Each timer is scheduled `delay` seconds ahead with `source`, one of
+    SOURCES, and its lateness is the difference between the loop time at which
+    it fired and the one it was scheduled for. Negative values mean it fired
+    early. `load` is the fraction of time a busy coroutine occupies the loop
+    and `threads` the number of busy threads competing for the GIL.
+    """
+    loop = _new_loop(kind, timer_type)
+    asyncio.set_event_loop(loop)
+    stopping = threading.Event()
+    workers = [
+        threading.Thread(target=_thread_load, args=(stopping,), daemon=True)
+        for _ in range(threads)
+    ]
+
+    async def main():
+        busy = asyncio.ensure_future(_loop_load(load)) if load > 0 else None
+        try:
+            return [await SOURCES[source](loop, delay) for _ in range(samples)]
+        finally:
+            if busy is not None:
+                busy.cancel()
+
+    try:
+        for worker in workers:
+            worker.start()
+        return loop.run_until_complete(main())
+    finally:
+        stopping.set()
+        for worker in workers:
+            worker.join()
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def summarize(lateness):
+    lateness_ms = [dt * 1000 for dt in lateness]
+    return {
+        "samples": len(lateness_ms),
+        "early": sum(1 for dt in lateness_ms if dt < 0),
+        "late_min_ms": min(lateness_ms),
+        "late_mean_ms": statistics.mean(lateness_ms),
+        "late_p50_ms": _percentile(lateness_ms, 50),
+        "late_p90_ms": _percentile(lateness_ms, 90),
+        "late_p99_ms": _percentile(lateness_ms, 99),
+        "late_max_ms": max(lateness_ms),
+        "jitter_ms": statistics.pstdev(lateness_ms),
+    }
+
+
+def histogram(lateness, bins=12, width=50):
+    """Return a text histogram of lateness values in seconds."""
+    lateness_ms = [dt * 1000 for dt in lateness]
+    low, high = min(lateness_ms), max(lateness_ms)
+    step = (high - low) / bins or 1.0
+    counts = [0] * bins
+    for value in lateness_ms:
+        counts[min(bins - 1, int((value - low) / step))] += 1
+    peak = max(counts)
+    lines = []
+    for i, count in enumerate(counts):
+        start = low + i * step
+        bar = "#" * round(count / peak * width)
+        lines.append(f"{start:9.3f} ms {count:6d} {bar}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "sources", nargs="*", help="timer sources to measure, default all"
+    )
+    parser.add_argument(
+        "--kinds", default=",".join(KINDS), help="comma separated loop kinds"
+    )
+    parser.add_argument(
+        "--timer-type",
+        choices=TIMER_TYPES,
+        help="Qt timer type of the qasync loop, default the Qt default (coarse)",
+    )
+    parser.add_argument(
+        "--delay", type=float, default=0.01, help="timer delay in seconds"
+    )
+    parser.add_argument("--samples", type=int, default=200, help="timers per source")
+    parser.add_argument(
+        "--load",
+        type=float,
+        default=0.0,
+        help="fraction of time a busy coroutine keeps the loop occupied",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=0, help="busy threads competing for the GIL"
+    )
+    parser.add_argument("--output", help="write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.load < 1:
+        parser.error("--load must be at least 0 and less than 1")
+    sources = args.sources or list(SOURCES)
+    unknown = set(sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+    kinds = args.kinds.split(",")
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown loop kinds: {', '.join(sorted(unknown))}")
+
+    results = {
+        "config": {
+            "delay": args.delay,
+            "samples": args.samples,
+            "timer_type": args.timer_type,
+            "load": args.load,
+            "threads": args.threads,
+        },
+        "results": {},
+    }
+    for source in sources:
+        results["results"][source] = {}
+        for kind in kinds:
+            lateness = measure(
+                kind,
+                source,
+                args.delay,
+                args.samples,
+                timer_type=args.timer_type,
+                load=args.load,
+                threads=args.threads,
+            )
+            summary = summarize(lateness)
+            results["results"][source][kind] = summary
+            print(
+                f"{source} on {kind}: mean {summary['late_mean_ms']:.3f} ms, "
+                f"p99 {summary['late_p99_ms']:.3f} ms, "
+                f"jitter {summary['jitter_ms']:.3f} ms",
+                file=sys.stderr,
+            )
+            print(histogram(lateness), file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,22 +8,58 @@ Copyright (c) 2014 Arve Knudsen <arve.knudsen@gmail.com>
 BSD License
 """
 
-__all__ = ["QEventLoop", "QThreadExecutor", "asyncSlot", "asyncClose", "asyncWrap"]
+__all__ = [
+    "QEventLoop",
+    "VirtualTimeQEventLoop",
+    "QLoopPool",
+    "ThreadSafeQueue",
+    "QThreadExecutor",
+    "asyncSlot",
+    "asyncClose",
+    "asyncWrap",
+    "signal_stream",
+    "wait_signal",
+    "task_scope",
+    "live_tasks",
+    "yield_now",
+    "idle",
+    "sliced",
+    "LoopWatchdog",
+    "LoopTracer",
+    "BufferPool",
+    "PooledBufferedProtocol",
+    "qimage_from_buffer",
+]
 
 import asyncio
+import collections
 import contextlib
 import functools
 import importlib
+import importlib.util
 import inspect
 import itertools
 import logging
+import math
 import os
+import select
+import socket
+import struct
 import sys
+import threading
 import time
+import types
 from concurrent.futures import Future
 from queue import Queue
 from typing import TYPE_CHECKING, Literal, Tuple, cast, get_args
 
+try:
+    import fcntl
+    import termios
+except ImportError:  # pragma: no cover
+    # Windows
+    fcntl = termios = None
+
 logger = logging.getLogger(__name__)
 
 # runtime preference order is the same as this literal
@@ -48,13 +84,11 @@ def _get_qt_flavor() -> QtFlavor:
     for name in QT_ALL:
         if name in sys.modules:
             return cast(QtFlavor, name)
-    # use the first available on system
+    # use the first available on system, finding it is much cheaper than
+    # importing it
     for name in QT_ALL:
-        try:
-            importlib.import_module(name)
+        if importlib.util.find_spec(name) is not None:
             return cast(QtFlavor, name)
-        except ImportError:
-            continue
     raise ImportError("No Qt implementations found")
 
 
@@ -67,8 +101,6 @@ if TYPE_CHECKING:
 else:
     qt_flavor = _get_qt_flavor()
     QtCore = importlib.import_module(f"{qt_flavor}.QtCore")
-    QtWidgets = importlib.import_module(f"{qt_flavor}.QtWidgets")
-    QApplication = QtWidgets.QApplication
 
     # PyQt uses pyqtSlot, PySide uses Slot
     Slot = getattr(QtCore, "pyqtSlot", None) or getattr(QtCore, "Slot", None)
@@ -79,6 +111,26 @@ else:
     )
     AllEvents = Flags(0x00)
 
+
+def _qt_widgets():
+    """Import QtWidgets, which is only needed for widget applications."""
+    global QtWidgets, QApplication
+    if "QtWidgets" not in globals():
+        QtWidgets = importlib.import_module(f"{qt_flavor}.QtWidgets")
+        QApplication = QtWidgets.QApplication
+    return QtWidgets
+
+
+def __getattr__(name):
+    # QtWidgets and QApplication are resolved on first use, so that headless
+    # programs do not load the GUI libraries
+    if name in ("QtWidgets", "QApplication"):
+        _qt_widgets()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+from . import _tracing  # noqa
 from ._common import with_logger  # noqa
 
 # strong references to running background tasks
@@ -119,6 +171,10 @@ class _QThreadWorker(QtCore.QThread):
             )
             if future.set_running_or_notify_cancel():
                 self._logger.debug("Invoking callback")
+                tracer = _tracing.active_tracer
+                if tracer is not None:
+                    tracer.name_thread(f"QThreadWorker #{self.__num}")
+                    t0 = time.perf_counter_ns()
                 try:
                     r = callback(*args, **kwargs)
                 except Exception as err:
@@ -130,6 +186,14 @@ class _QThreadWorker(QtCore.QThread):
                 finally:
                     # Release potential reference
                     r = None  # noqa
+                    if tracer is not None:
+                        tracer.complete(
+                            getattr(callback, "__qualname__", None)
+                            or type(callback).__qualname__,
+                            "executor",
+                            t0,
+                            time.perf_counter_ns(),
+                        )
             else:
                 self._logger.debug("Future was canceled")
 
@@ -217,13 +281,135 @@ class QThreadExecutor:
         self.shutdown()
 
 
+def _handle_task(handle: asyncio.Handle):
+    """Return the task a handle steps or wakes up, if any."""
+    task = getattr(getattr(handle, "_callback", None), "__self__", None)
+    if isinstance(task, asyncio.tasks.Task):
+        return task
+    return None
+
+
 def _format_handle(handle: asyncio.Handle):
-    cb = getattr(handle, "_callback", None)
-    if isinstance(getattr(cb, "__self__", None), asyncio.tasks.Task):
-        return repr(cb.__self__)
+    task = _handle_task(handle)
+    if task is not None:
+        return repr(task)
     return str(handle)
 
 
+def _task_label(task):
+    """Name tasks by their coroutine, or by their slot if started by asyncSlot."""
+    if task in background_tasks:
+        return task.get_name()
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or task.get_name()
+
+
+def _profile_key(handle: asyncio.Handle):
+    """
+    Return what task_profile() accounts a handle to.
+
+    That is the task it belongs to, or the slot name for tasks started by
+    asyncSlot, and its own label for callbacks outside of tasks.
+    """
+    task = _handle_task(handle)
+    if task is None:
+        return _handle_label(handle)
+    if task in background_tasks:
+        return task.get_name()
+    return task
+
+
+def _profile_name(key):
+    if isinstance(key, str):
+        return key
+    coro = key.get_coro()
+    name = getattr(coro, "__qualname__", None) or repr(coro)
+    return f"{key.get_name()} ({name})"
+
+
+def _handle_label(handle: asyncio.Handle):
+    """Short description of a handle, much cheaper than _format_handle."""
+    task = _handle_task(handle)
+    if task is not None:
+        return _task_label(task)
+    cb = handle._callback
+    return getattr(cb, "__qualname__", None) or type(cb).__qualname__
+
+
+def _pending_bytes(fd):
+    """Return how many bytes can be read from fd without blocking, 0 if unknown."""
+    if fcntl is not None:
+        try:
+            return struct.unpack("i", fcntl.ioctl(fd, termios.FIONREAD, b"\0" * 4))[0]
+        except OSError:
+            return 0
+    # Windows sockets, select() tells whether something can be read at all
+    try:
+        return 1 if select.select([fd], [], [], 0)[0] else 0
+    except OSError:
+        return 0
+
+
+def _drain_reads(fd, run, is_current, budget):
+    """
+    Run a reader callback again while its fd has data and budget is left.
+
+    budget is a (bytes, seconds) tuple, bytes are counted from the data that
+    is pending before each run.
+    """
+    max_bytes, max_time = budget
+    deadline = time.perf_counter() + max_time
+    while True:
+        pending = _pending_bytes(fd)
+        if pending <= 0 or not is_current():
+            return
+        run()
+        max_bytes -= pending
+        if max_bytes <= 0 or time.perf_counter() >= deadline:
+            return
+
+
+class _NotifierHandle(asyncio.Handle):
+    """Handle for a reader or writer callback triggered by a socket notifier."""
+
+    __slots__ = ("_notifiers", "_notifier", "_fd", "_budget")
+
+    def __init__(self, notifiers, notifier, fd, callback, args, loop, budget=None):
+        super().__init__(callback, args, loop)
+        self._notifiers = notifiers
+        self._notifier = notifier
+        self._fd = fd
+        # (bytes, seconds) to keep reading for, see set_read_draining()
+        self._budget = budget
+
+    def _run(self):
+        # This handle runs with a certain delay. We cannot know
+        # for sure that the notifier is still the current notifier for
+        # the fd.
+        notifiers, notifier, fd = self._notifiers, self._notifier, self._fd
+        if notifiers.get(fd, None) is not notifier:
+            return
+        try:
+            super()._run()
+            if self._budget is not None:
+                _drain_reads(
+                    fd,
+                    super()._run,
+                    lambda: not self._cancelled and notifiers.get(fd) is notifier,
+                    self._budget,
+                )
+        finally:
+            # The notifier might have been overriden by the
+            # callback. We must not re-enable it in that case.
+            if notifiers.get(fd, None) is notifier:
+                notifier.setEnabled(True)
+
+
+_TaskProfileEntry = collections.namedtuple(
+    "_TaskProfileEntry", ["name", "runs", "wall", "cpu"]
+)
+
+
 def _make_signaller(qtimpl_qtcore, *args):
     class Signaller(qtimpl_qtcore.QObject):
         try:
@@ -234,62 +420,241 @@ def _make_signaller(qtimpl_qtcore, *args):
     return Signaller()
 
 
+def _register_event_type():
+    event_type = QtCore.QEvent.registerEventType()
+    try:
+        return QtCore.QEvent.Type(event_type)
+    except (TypeError, ValueError):  # pragma: no cover
+        # bindings whose enum does not accept registered types
+        return event_type
+
+
+class _EventPoster(QtCore.QObject):
+    """
+    Receiver of thread-safe calls, woken by a posted QEvent.
+
+    Callbacks wait in a Python queue, and an event is only posted when the
+    queue may have been drained, so a burst of calls from other threads costs
+    a single event, without converting any arguments for a signal.
+    """
+
+    _event_type = None
+
+    def __init__(self, loop):
+        super().__init__()
+        if _EventPoster._event_type is None:
+            _EventPoster._event_type = _register_event_type()
+        self.__loop = loop
+        self.__queue = collections.deque()
+        self.__posted = False
+
+    def post(self, callback, args):
+        self.__queue.append((callback, args))
+        # a concurrent post may see __posted still unset and post a second
+        # event, which then finds an empty queue
+        if not self.__posted:
+            self.__posted = True
+            QtCore.QCoreApplication.postEvent(self, QtCore.QEvent(self._event_type))
+
+    def event(self, event):
+        if event.type() != self._event_type:
+            return super().event(event)
+        # reset before draining, calls posted from now on post a new event
+        self.__posted = False
+        queue, call_soon = self.__queue, self.__loop._call_soon
+        while queue:
+            call_soon(*queue.popleft())
+        return True
+
+    def clear(self):
+        self.__queue.clear()
+
+
 @with_logger
 class _SimpleTimer(QtCore.QObject):
-    def __init__(self):
+    def __init__(self, loop, max_batch_time=None, timer_type=None, slack=0):
         super().__init__()
+        self.__loop = loop
+        self.timer_type = timer_type
+        self.slack = slack
+        # timer id -> handle of the callbacks with their own timer
         self.__callbacks = {}
+        # coalesced callbacks: timer id -> (deadline in ms, handles), and the
+        # timer id of each pending deadline
+        self.__groups = {}
+        self.__deadlines = {}
+        # callbacks without delay are queued here and run in batches by a
+        # single zero timer, instead of starting a Qt timer for each of them
+        self.__ready = collections.deque()
+        self.__ready_timerid = None
+        # event loop level of the running batch, to detect nested event loops
+        self.__batch_level = None
         self._stopped = False
         self.__debug_enabled = False
+        self.max_batch_time = max_batch_time
+        self.batches = 0
+        self.budget_exceeded = 0
+        self.wakeups = 0
+
+    def add_ready(self, handle):
+        """Queue a handle for the next batch, without starting a timer of its own."""
+        self.__ready.append(handle)
+        if self.__ready_timerid is None:
+            self.__ready_timerid = self.startTimer(0)
+            self.__log_debug("Registering ready timer id %s", self.__ready_timerid)
+        elif (
+            self.__batch_level is not None
+            and self.thread().loopLevel() > self.__batch_level
+        ):
+            # A callback of the running batch started a nested event loop, e.g.
+            # with QDialog.exec(). Qt does not fire the ready timer again until
+            # its timerEvent() returns, so the queue is handed to a fresh timer.
+            self.__batch_level = None
+            self.killTimer(self.__ready_timerid)
+            self.__ready_timerid = self.startTimer(0)
+            self.__log_debug(
+                "Nested event loop, new ready timer id %s", self.__ready_timerid
+            )
+        return handle
+
+    def add_callback(self, handle, delay=0, timer_type=None, tolerance=None):
+        if delay <= 0:
+            return self.add_ready(handle)
 
-    def add_callback(self, handle, delay=0):
-        timerid = self.startTimer(int(max(0, delay) * 1000))
-        self.__log_debug("Registering timer id %s", timerid)
-        assert timerid not in self.__callbacks
+        if tolerance is None:
+            tolerance = self.slack
+        if tolerance > 0:
+            return self.__add_coalesced(handle, delay, timer_type, tolerance)
+
+        timerid = self.__start_timer(delay, timer_type)
+        if self.__debug_enabled:
+            self.__log_debug("Registering timer id %s", timerid)
         self.__callbacks[timerid] = handle
         return handle
 
+    def __start_timer(self, delay, timer_type):
+        if timer_type is None:
+            timer_type = self.timer_type
+        # round up, so that precise timers do not run callbacks early, coarse
+        # timers may still fire up to 5% of the delay before it has passed
+        msecs = _ceil(delay * 1000)
+        if timer_type is None:
+            return self.startTimer(msecs)
+        return self.startTimer(msecs, timer_type)
+
+    def __add_coalesced(self, handle, delay, timer_type, tolerance):
+        """
+        Share one Qt timer between the callbacks due in the same window.
+
+        The deadline is rounded up to a multiple of the tolerance on the loop's
+        clock, so that all callbacks falling into the same window, including
+        unrelated periodic ones, are run by a single wakeup at its end.
+        """
+        now = self.__loop.time()
+        deadline = _ceil((now + delay) / tolerance) * tolerance
+        key = _ceil(deadline * 1000)
+        timerid = self.__deadlines.get(key)
+        if timerid is None:
+            timerid = self.__start_timer(key / 1000 - now, timer_type)
+            self.__log_debug("Registering coalescing timer id %s", timerid)
+            self.__deadlines[key] = timerid
+            self.__groups[timerid] = (key, [handle])
+        else:
+            self.__groups[timerid][1].append(handle)
+        return handle
+
     def timerEvent(self, event):  # noqa: N802
         timerid = event.timerId()
-        self.__log_debug("Timer event on id %s", timerid)
+        if timerid == self.__ready_timerid and not self._stopped:
+            self.__run_ready()
+            return
+        if self.__debug_enabled:
+            self.__log_debug("Timer event on id %s", timerid)
         if self._stopped:
             self.__log_debug("Timer stopped, killing %s", timerid)
             self.killTimer(timerid)
-            del self.__callbacks[timerid]
-        else:
-            try:
-                handle = self.__callbacks[timerid]
-            except KeyError as e:
-                self.__log_debug(e)
-                pass
+            if timerid == self.__ready_timerid:
+                self.__ready_timerid = None
+                self.__ready.clear()
+            elif timerid in self.__groups:
+                del self.__deadlines[self.__groups.pop(timerid)[0]]
             else:
-                if handle._cancelled:
-                    self.__log_debug("Handle %s cancelled", handle)
-                else:
-                    if self.__debug_enabled:
-                        # This may not be the most efficient thing to do, but it removes the need to sync
-                        # "slow_callback_duration" and "_current_handle" variables
-                        loop = asyncio.get_event_loop()
-                        try:
-                            loop._current_handle = handle
-                            self._logger.debug("Calling handle %s", handle)
-                            t0 = time.time()
-                            handle._run()
-                            dt = time.time() - t0
-                            if dt >= loop.slow_callback_duration:
-                                self._logger.warning(
-                                    "Executing %s took %.3f seconds",
-                                    _format_handle(handle),
-                                    dt,
-                                )
-                        finally:
-                            loop._current_handle = None
-                    else:
-                        handle._run()
-            finally:
                 del self.__callbacks[timerid]
-                handle = None
+        elif timerid in self.__groups:
+            self.wakeups += 1
+            self.killTimer(timerid)
+            key, handles = self.__groups.pop(timerid)
+            del self.__deadlines[key]
+            tracer = _tracing.active_tracer
+            if tracer is not None:
+                tracer.instant("timer", "timer", {"id": timerid, "n": len(handles)})
+            for handle in handles:
+                if not handle._cancelled:
+                    self.__loop._run_handle(handle)
+            handle = None
+        else:
+            self.wakeups += 1
             self.killTimer(timerid)
+            tracer = _tracing.active_tracer
+            if tracer is not None:
+                tracer.instant("timer", "timer", {"id": timerid})
+            handle = self.__callbacks.pop(timerid, None)
+            if handle is None:
+                self.__log_debug("No callback for timer id %s", timerid)
+            elif handle._cancelled:
+                self.__log_debug("Handle %s cancelled", handle)
+            else:
+                self.__loop._run_handle(handle)
+
+    def __run_ready(self):
+        """
+        Run the callbacks which were ready when the batch started.
+
+        Callbacks scheduled while the batch runs are left for the next batch,
+        as are the remaining ones once max_batch_time is used up. The zero
+        timer only fires again after Qt has processed pending input and paint
+        events, so a flood of callbacks cannot freeze the GUI.
+        """
+        ready = self.__ready
+        budget = self.max_batch_time
+        if budget is not None:
+            deadline = time.perf_counter() + budget
+        self.batches += 1
+        batch = self.batches
+        tracer = _tracing.active_tracer
+        if tracer is not None:
+            t0 = time.perf_counter_ns()
+
+        run_handle = self.__loop._run_handle
+        popleft = ready.popleft
+        ntodo = len(ready)
+        self.__batch_level = self.thread().loopLevel()
+        try:
+            while ntodo:
+                ntodo -= 1
+                handle = popleft()
+                if handle._cancelled:
+                    continue
+                run_handle(handle)
+                if self.batches != batch:
+                    # a nested event loop ran the rest of the queue
+                    break
+                if ntodo and budget is not None and time.perf_counter() >= deadline:
+                    self.__log_debug("Batch time budget used up, deferring %s", ntodo)
+                    self.budget_exceeded += 1
+                    break
+        finally:
+            self.__batch_level = None
+        handle = None
+        if tracer is not None:
+            tracer.complete("ready batch", "batch", t0, time.perf_counter_ns())
+
+        if not ready and self.__ready_timerid is not None:
+            self.killTimer(self.__ready_timerid)
+            self.__ready_timerid = None
+
+    def has_ready(self):
+        return bool(self.__ready)
 
     def stop(self):
         self.__log_debug("Stopping timers")
@@ -303,6 +668,61 @@ class _SimpleTimer(QtCore.QObject):
             self._logger.debug(*args, **kwargs)
 
 
+# Qt5/Qt6 compatibility
+_TimerType = getattr(QtCore.Qt, "TimerType", QtCore.Qt)
+_TIMER_TYPES = {
+    "precise": _TimerType.PreciseTimer,
+    "coarse": _TimerType.CoarseTimer,
+    "very_coarse": _TimerType.VeryCoarseTimer,
+}
+
+
+def _ceil(value):
+    """Round up, ignoring float noise such as in 0.001 * 3 * 1000."""
+    return math.ceil(value - 1e-6)
+
+
+def _timer_type(timer_type):
+    """Accept Qt timer types as well as their lower case names."""
+    if isinstance(timer_type, str):
+        try:
+            return _TIMER_TYPES[timer_type]
+        except KeyError:
+            raise ValueError(
+                f"timer_type must be one of {', '.join(_TIMER_TYPES)}, "
+                f"not {timer_type!r}"
+            ) from None
+    return timer_type
+
+
+# types of callables which cannot be coroutine functions, see _check_callback()
+_plain_callables = set()
+
+
+def _check_callback(callback, method):
+    cls = type(callback)
+    if cls in _plain_callables:
+        return
+    function = callback.__func__ if cls is types.MethodType else callback
+    # A plain function is a coroutine function when its code says so, or when
+    # it has been marked as one, which requires attributes in its __dict__.
+    if (
+        type(function) is types.FunctionType
+        and not function.__code__.co_flags & inspect.CO_COROUTINE
+        and not function.__dict__
+    ):
+        return
+    if inspect.iscoroutinefunction(callback):
+        raise TypeError(f"coroutines cannot be used with {method}")
+    if not callable(callback):
+        raise TypeError("callback must be callable: {}".format(cls.__name__))
+    # Callables without a __dict__ are implemented in C, like the ones asyncio
+    # tasks and futures schedule, and cannot be marked as coroutine functions.
+    # Inspecting them is costly, so it is done once per type.
+    if not hasattr(callback, "__dict__"):
+        _plain_callables.add(cls)
+
+
 def _fileno(fd):
     if isinstance(fd, int):
         return fd
@@ -333,28 +753,122 @@ class _QEventLoop:
     In this case the user is responsible for loop cleanup with stop() and close()
 
     The set_running_loop parameter is there for backwards compatibility and does nothing.
+
+    timer_type selects the Qt timer type used for delayed callbacks, either a
+    Qt.TimerType or one of "precise", "coarse" and "very_coarse". By default Qt uses
+    coarse timers, which may fire up to 5% late in exchange for fewer wakeups.
+    call_later() and call_at() accept a timer_type to override it per callback.
+
+    timer_slack is the number of seconds delayed callbacks may run late. With
+    slack, deadlines are rounded up to multiples of it and all callbacks due in
+    the same window share a single wakeup, which saves CPU time and power in
+    applications with many periodic timers. The tolerance argument of
+    call_later() and call_at() overrides it per callback, 0 disables
+    coalescing.
+
+    With use_qprocess=True, subprocesses are run with QProcess, which reports
+    output and exits with Qt signals instead of pipe notifiers and a child
+    watcher. This applies to subprocesses whose standard streams are pipes,
+    DEVNULL or inherited, and which at most set cwd and env, others still use
+    the asyncio implementation.
+
+    datagram_batch is the number of datagrams a datagram endpoint receives per
+    socket notification, on Unix. With a batch size, datagrams are read until
+    the socket would block or the batch is full, and protocols defining
+    datagrams_received(datagrams) get each batch as a list of (data, addr)
+    tuples. By default every datagram takes a separate notification.
+
+    threadsafe_wakeup selects how call_soon_threadsafe() wakes the loop. With
+    "signal", each call emits a queued Qt signal carrying the callback. With
+    "event", calls wait in a Python queue and a single custom QEvent is posted
+    until the loop drained it, which avoids the signal argument conversion and
+    coalesces bursts of calls from other threads.
+
+    run_in_executor() with executor None runs callbacks in a QThreadExecutor
+    meant for CPU bound work, with executor_workers threads, by default one
+    per CPU. Blocking I/O, including the name resolution of getaddrinfo() and
+    getnameinfo(), has a separate executor used by run_in_io_executor(), with
+    io_executor_workers threads, by default like concurrent.futures.
+
+    Callbacks registered with call_idle() only run when Qt is about to wait for new
+    events. Each idle pass runs callbacks for at most idle_batch_time seconds and
+    stops early as soon as regular callbacks become ready.
+
+    Callbacks which are ready to run are processed in batches. max_batch_time limits
+    how many seconds a batch may take, the remaining callbacks are deferred until Qt
+    has processed pending input and paint events. get_batch_stats() reports how often
+    the limit was hit.
     """
 
+    # a loop counts as closed until asyncio initialized it, so that
+    # BaseEventLoop.__del__ leaves loops alone whose arguments were invalid
+    _closed = True
+
     def __init__(
-        self, app=None, set_running_loop=False, already_running=False, qtparent=None
+        self,
+        app=None,
+        set_running_loop=False,
+        already_running=False,
+        qtparent=None,
+        max_batch_time=None,
+        idle_batch_time=0.005,
+        timer_type=None,
+        timer_slack=0,
+        use_qprocess=False,
+        datagram_batch=None,
+        threadsafe_wakeup="signal",
+        executor_workers=None,
+        io_executor_workers=None,
     ):
-        self.__app = app or QApplication.instance()
-        assert self.__app is not None, "No QApplication has been instantiated"
+        self.__app = app or QtCore.QCoreApplication.instance()
+        assert self.__app is not None, (
+            "No QApplication or QCoreApplication has been instantiated"
+        )
         self.__is_running = False
         self.__debug_enabled = False
         self.__default_executor = None
+        self.__io_executor = None
+        cpus = os.cpu_count() or 1
+        self.__executor_workers = executor_workers or cpus
+        self.__io_executor_workers = io_executor_workers or min(32, cpus + 4)
         self.__exception_handler = None
+        self.__slow_callback_handler = None
+        self.__slow_callback_threshold = None
+        self.__task_stats = None
+        self.__task_profile = None
+        self.__use_qprocess = use_qprocess
+        if datagram_batch is not None and datagram_batch < 1:
+            raise ValueError("datagram_batch must be at least 1")
+        self.__datagram_batch = datagram_batch
+        self.__datagram_buffers = None
+        self._read_budget = None
         self._read_notifiers = {}
         self._write_notifiers = {}
-        self._timer = _SimpleTimer()
+        if timer_slack < 0:
+            raise ValueError("timer_slack must not be negative")
+        if timer_type is not None:
+            timer_type = _timer_type(timer_type)
+        self._timer = _SimpleTimer(self, max_batch_time, timer_type, timer_slack)
+        self._idle_handles = collections.deque()
+        self._idle_batch_time = idle_batch_time
+        self.__idle_dispatcher = None
         self.qtparent = qtparent or self.__app
 
-        self.__call_soon_signaller = signaller = _make_signaller(QtCore, object, tuple)
-
-        self.__call_soon_signal = signaller.signal
-        self.__call_soon_signal.connect(
-            lambda callback, args: self.call_soon(callback, *args)
-        )
+        if threadsafe_wakeup == "signal":
+            signaller = _make_signaller(QtCore, object, tuple)
+            signaller.signal.connect(
+                lambda callback, args: self._call_soon(callback, args)
+            )
+            self.__post_threadsafe = signaller.signal.emit
+        elif threadsafe_wakeup == "event":
+            signaller = _EventPoster(self)
+            self.__post_threadsafe = signaller.post
+        else:
+            raise ValueError(
+                "threadsafe_wakeup must be 'signal' or 'event', "
+                f"not {threadsafe_wakeup!r}"
+            )
+        self.__call_soon_signaller = signaller
 
         assert self.__app is not None
         super().__init__()
@@ -383,6 +897,7 @@ class _QEventLoop:
 
             # for asyncio to recognize the already running loop
             asyncio.events._set_running_loop(self)
+            self._thread_id = threading.get_ident()
 
     def get_qtparent(self):
         return self.qtparent
@@ -399,6 +914,7 @@ class _QEventLoop:
         try:
             self.__log_debug("Starting Qt event loop")
             asyncio.events._set_running_loop(self)
+            self._thread_id = threading.get_ident()
             rslt = -1
             if hasattr(self.__app, "exec"):
                 rslt = self.__app.exec()
@@ -407,6 +923,7 @@ class _QEventLoop:
             self.__log_debug("Qt event loop ended with result %s", rslt)
             return rslt
         finally:
+            self._thread_id = None
             asyncio.events._set_running_loop(None)
             self._after_run_forever()
             self.__is_running = False
@@ -480,10 +997,15 @@ class _QEventLoop:
 
         if self.__default_executor is not None:
             self.__default_executor.shutdown()
+        if self.__io_executor is not None:
+            self.__io_executor.shutdown()
 
         # Disconnect thread-safe signaller and schedule deletion of helper QObjects
         try:
-            self.__call_soon_signal.disconnect()
+            if isinstance(self.__call_soon_signaller, _EventPoster):
+                self.__call_soon_signaller.clear()
+            else:
+                self.__call_soon_signaller.signal.disconnect()
         except Exception:  # pragma: no cover
             pass
         try:
@@ -492,6 +1014,9 @@ class _QEventLoop:
         except Exception:  # pragma: no cover
             pass
 
+        self.__disconnect_idle()
+        self._idle_handles.clear()
+
         # Stop timers first to avoid late invocations during teardown
         self._timer.stop()
         try:
@@ -513,43 +1038,169 @@ class _QEventLoop:
         # Finally, clear app reference
         self.__app = None
 
-    def call_later(self, delay, callback, *args, context=None):
-        """Register callback to be invoked after a certain delay."""
-        if inspect.iscoroutinefunction(callback):
-            raise TypeError("coroutines cannot be used with call_later")
-        if not callable(callback):
-            raise TypeError(
-                "callback must be callable: {}".format(type(callback).__name__)
+    def call_later(
+        self, delay, callback, *args, context=None, timer_type=None, tolerance=None
+    ):
+        """
+        Register callback to be invoked after a certain delay.
+
+        timer_type and tolerance override the Qt timer type and timer slack of
+        the loop for this callback.
+        """
+        _check_callback(callback, "call_later")
+        if self.__debug_enabled:
+            self.__log_debug(
+                "Registering callback %s to be invoked with arguments %s after %s "
+                "second(s)",
+                callback,
+                args,
+                delay,
             )
 
-        self.__log_debug(
-            "Registering callback %s to be invoked with arguments %s after %s second(s)",
-            callback,
-            args,
-            delay,
+        if timer_type is not None:
+            timer_type = _timer_type(timer_type)
+        if tolerance is not None and tolerance < 0:
+            raise ValueError("tolerance must not be negative")
+        return self._add_callback(
+            asyncio.Handle(callback, args, self, context), delay, timer_type, tolerance
         )
 
-        if sys.version_info >= (3, 7):
-            return self._add_callback(
-                asyncio.Handle(callback, args, self, context=context), delay
-            )
-        return self._add_callback(asyncio.Handle(callback, args, self), delay)
-
-    def _add_callback(self, handle, delay=0):
-        return self._timer.add_callback(handle, delay)
+    def _add_callback(self, handle, delay=0, timer_type=None, tolerance=None):
+        return self._timer.add_callback(handle, delay, timer_type, tolerance)
 
     def call_soon(self, callback, *args, context=None):
         """Register a callback to be run on the next iteration of the event loop."""
-        return self.call_later(0, callback, *args, context=context)
+        # This is what every `await asyncio.sleep(0)` and every resumed task
+        # goes through, so the handle is queued directly for the next batch.
+        _check_callback(callback, "call_soon")
+        if self.__debug_enabled:
+            self.__log_debug(
+                "Registering callback %s to be invoked with arguments %s",
+                callback,
+                args,
+            )
+        return self._timer.add_ready(asyncio.Handle(callback, args, self, context))
 
-    def call_at(self, when, callback, *args, context=None):
+    def _call_soon(self, callback, args, context=None):
+        """call_soon() without argument checks, for callbacks qasync schedules."""
+        return self._timer.add_ready(asyncio.Handle(callback, args, self, context))
+
+    def call_at(
+        self, when, callback, *args, context=None, timer_type=None, tolerance=None
+    ):
         """Register callback to be invoked at a certain time."""
-        return self.call_later(when - self.time(), callback, *args, context=context)
+        return self.call_later(
+            when - self.time(),
+            callback,
+            *args,
+            context=context,
+            timer_type=timer_type,
+            tolerance=tolerance,
+        )
 
     def time(self):
         """Get time according to event loop's clock."""
         return time.monotonic()
 
+    async def _make_subprocess_transport(
+        self,
+        protocol,
+        args,
+        shell,
+        stdin,
+        stdout,
+        stderr,
+        bufsize,
+        extra=None,
+        **kwargs,
+    ):
+        if self.__use_qprocess and _process.supports(
+            shell, stdin, stdout, stderr, kwargs
+        ):
+            return await _process.make_transport(
+                self, protocol, args, shell, stdin, stdout, stderr, kwargs
+            )
+        return await super()._make_subprocess_transport(
+            protocol, args, shell, stdin, stdout, stderr, bufsize, extra, **kwargs
+        )
+
+    def _make_datagram_transport(
+        self, sock, protocol, address=None, waiter=None, extra=None
+    ):
+        if self.__datagram_batch is None or sys.platform == "win32":
+            return super()._make_datagram_transport(
+                sock, protocol, address, waiter, extra
+            )
+        if self.__datagram_buffers is None:
+            self.__datagram_buffers = BufferPool(
+                _datagram.BatchedDatagramTransport.max_size
+            )
+        return _datagram.BatchedDatagramTransport(
+            self,
+            sock,
+            protocol,
+            address,
+            waiter,
+            extra,
+            batch_size=self.__datagram_batch,
+            buffers=self.__datagram_buffers,
+        )
+
+    def call_idle(self, callback, *args, context=None):
+        """
+        Register a callback to be run once Qt has no other events to process.
+
+        Idle callbacks run after pending input, paint and timer events as well as
+        ready asyncio callbacks have been handled.
+        """
+        self._check_closed()
+        _check_callback(callback, "call_idle")
+        if self.__debug_enabled:
+            self.__log_debug(
+                "Registering idle callback %s with arguments %s", callback, args
+            )
+        handle = asyncio.Handle(callback, args, self, context=context)
+        self._idle_handles.append(handle)
+        if self.__idle_dispatcher is None:
+            dispatcher = QtCore.QAbstractEventDispatcher.instance(
+                QtCore.QThread.currentThread()
+            )
+            dispatcher.aboutToBlock.connect(self.__on_about_to_block)
+            self.__idle_dispatcher = dispatcher
+        return handle
+
+    def __on_about_to_block(self):
+        idle = self._idle_handles
+        timer = self._timer
+        if timer.has_ready():
+            # regular callbacks go first, we get another chance once they ran
+            return
+
+        deadline = time.perf_counter() + self._idle_batch_time
+        while idle:
+            handle = idle.popleft()
+            if handle._cancelled:
+                continue
+            self._run_handle(handle)
+            if timer.has_ready() or time.perf_counter() >= deadline:
+                break
+        handle = None
+
+        if idle:
+            # keep the dispatcher from blocking, so that the remaining idle
+            # callbacks run in the next pass after the events that came in
+            self.__idle_dispatcher.wakeUp()
+        else:
+            self.__disconnect_idle()
+
+    def __disconnect_idle(self):
+        dispatcher, self.__idle_dispatcher = self.__idle_dispatcher, None
+        if dispatcher is not None:
+            try:
+                dispatcher.aboutToBlock.disconnect(self.__on_about_to_block)
+            except Exception:  # pragma: no cover
+                pass
+
     def _add_reader(self, fd, callback, *args):
         """Register a callback for when a file descriptor is ready for reading."""
         self._check_closed()
@@ -564,7 +1215,7 @@ class _QEventLoop:
             # will get overwritten by the assignment below anyways
 
         notifier = QtCore.QSocketNotifier(
-            _fileno(fd), QtCore.QSocketNotifier.Type.Read, self.__app
+            _fileno(fd), QtCore.QSocketNotifier.Type.Read, self.qtparent
         )
         notifier.setEnabled(True)
         self.__log_debug("Adding reader callback for file descriptor %s", fd)
@@ -604,7 +1255,7 @@ class _QEventLoop:
         notifier = QtCore.QSocketNotifier(
             _fileno(fd),
             QtCore.QSocketNotifier.Type.Write,
-            self.__app,
+            self.qtparent,
         )
         notifier.setEnabled(True)
         self.__log_debug("Adding writer callback for file descriptor %s", fd)
@@ -629,20 +1280,6 @@ class _QEventLoop:
             self._delete_notifier(notifier)
             return True
 
-    def __notifier_cb_wrapper(self, notifiers, notifier, fd, callback, args):
-        # This wrapper gets called with a certain delay. We cannot know
-        # for sure that the notifier is still the current notifier for
-        # the fd.
-        if notifiers.get(fd, None) is not notifier:
-            return
-        try:
-            callback(*args)
-        finally:
-            # The notifier might have been overriden by the
-            # callback. We must not re-enable it in that case.
-            if notifiers.get(fd, None) is notifier:
-                notifier.setEnabled(True)
-
     def __on_notifier_ready(self, notifiers, notifier, fd, callback, args):
         if fd not in notifiers:  # pragma: no cover
             self._logger.warning(
@@ -658,9 +1295,14 @@ class _QEventLoop:
         # ZeroMQ sockets for events
         assert notifier.isEnabled()
         self.__log_debug("Socket notifier for fd %s is ready", fd)
+        tracer = _tracing.active_tracer
+        if tracer is not None:
+            kind = "read" if notifiers is self._read_notifiers else "write"
+            tracer.instant(f"{kind} notifier", "notifier", {"fd": fd})
         notifier.setEnabled(False)
-        self.call_soon(
-            self.__notifier_cb_wrapper, notifiers, notifier, fd, callback, args
+        budget = self._read_budget if notifiers is self._read_notifiers else None
+        self._add_callback(
+            _NotifierHandle(notifiers, notifier, fd, callback, args, self, budget)
         )
 
     @staticmethod
@@ -679,7 +1321,12 @@ class _QEventLoop:
 
     def call_soon_threadsafe(self, callback, *args, context=None):
         """Thread-safe version of call_soon."""
-        self.__call_soon_signal.emit(callback, args)
+        # checked here, so that errors are raised in the calling thread
+        _check_callback(callback, "call_soon_threadsafe")
+        tracer = _tracing.active_tracer
+        if tracer is not None:
+            tracer.instant("call_soon_threadsafe", "wakeup")
+        self.__post_threadsafe(callback, args)
 
     def run_in_executor(self, executor, callback, *args):
         """Run callback in executor.
@@ -702,14 +1349,44 @@ class _QEventLoop:
             executor = self.__default_executor
 
         if executor is None:
-            self.__log_debug("Creating default executor")
-            executor = self.__default_executor = QThreadExecutor()
+            self.__log_debug(
+                "Creating default executor with %d workers", self.__executor_workers
+            )
+            executor = self.__default_executor = QThreadExecutor(
+                self.__executor_workers
+            )
 
         return asyncio.wrap_future(executor.submit(callback, *args))
 
+    def run_in_io_executor(self, callback, *args):
+        """Run callback in the executor for blocking I/O, see run_in_executor()."""
+        if self.__io_executor is None:
+            self.__log_debug(
+                "Creating I/O executor with %d workers", self.__io_executor_workers
+            )
+            self.__io_executor = QThreadExecutor(self.__io_executor_workers)
+        return self.run_in_executor(self.__io_executor, callback, *args)
+
     def set_default_executor(self, executor):
         self.__default_executor = executor
 
+    def set_io_executor(self, executor):
+        self.__io_executor = executor
+
+    async def getaddrinfo(self, host, port, *, family=0, type=0, proto=0, flags=0):
+        # name resolution must not wait behind CPU bound jobs of the default
+        # executor
+        if self.get_debug():
+            getaddrinfo = self._getaddrinfo_debug
+        else:
+            getaddrinfo = socket.getaddrinfo
+        return await self.run_in_io_executor(
+            getaddrinfo, host, port, family, type, proto, flags
+        )
+
+    async def getnameinfo(self, sockaddr, flags=0):
+        return await self.run_in_io_executor(socket.getnameinfo, sockaddr, flags)
+
     # Error handlers.
 
     def set_exception_handler(self, handler):
@@ -781,6 +1458,140 @@ class _QEventLoop:
                     exc_info=True,
                 )
 
+    def get_batch_stats(self):
+        """
+        Return statistics about the batches of ready callbacks.
+
+        "batches" is the number of batches run, "budget_exceeded" the number of
+        batches which were cut short because they exceeded max_batch_time.
+        "timer_wakeups" is the number of Qt timer events which ran delayed
+        callbacks, see timer_slack.
+        """
+        return {
+            "batches": self._timer.batches,
+            "budget_exceeded": self._timer.budget_exceeded,
+            "timer_wakeups": self._timer.wakeups,
+        }
+
+    # Slow callback detection.
+
+    def _run_handle(self, handle):
+        """Run a ready handle, timing it if slow callbacks are being detected."""
+        tracer = _tracing.active_tracer
+        task_stats = self.__task_stats
+        detect_slow = self.__slow_callback_handler is not None or self.__debug_enabled
+        if tracer is None and task_stats is None and not detect_slow:
+            handle._run()
+            return
+
+        self._current_handle = handle
+        self.__log_debug("Calling handle %s", handle)
+        if task_stats is not None:
+            c0 = time.thread_time_ns()
+        t0 = time.perf_counter_ns()
+        try:
+            handle._run()
+        finally:
+            t1 = time.perf_counter_ns()
+            self._current_handle = None
+
+        if task_stats is not None:
+            cpu = time.thread_time_ns() - c0
+            key = _profile_key(handle)
+            stats = task_stats.get(key)
+            if stats is None:
+                task_stats[key] = [_profile_name(key), 1, t1 - t0, cpu]
+            else:
+                stats[1] += 1
+                stats[2] += t1 - t0
+                stats[3] += cpu
+        if tracer is not None:
+            tracer.complete(_handle_label(handle), "handle", t0, t1)
+        if not detect_slow:
+            return
+
+        dt = (t1 - t0) / 1e9
+        threshold = self.__slow_callback_threshold
+        if threshold is None:
+            threshold = self.slow_callback_duration
+        if dt >= threshold:
+            handler = self.__slow_callback_handler or self.__log_slow_callback
+            try:
+                handler(self, handle, dt)
+            except Exception:
+                self.__log_error("Exception in slow callback handler", exc_info=True)
+
+    def set_slow_callback_handler(self, handler, threshold=None):
+        """
+        Report callbacks which take at least `threshold` seconds to `handler`.
+
+        The handler is called as `handler(loop, handle, duration)`. If threshold
+        is None, slow_callback_duration is used. Unlike debug mode this only adds
+        a monotonic clock read around each callback, so it is cheap enough to be
+        left on in production. Pass None as handler to disable it again.
+        """
+        self.__slow_callback_handler = handler
+        self.__slow_callback_threshold = threshold
+
+    def get_slow_callback_handler(self):
+        return self.__slow_callback_handler
+
+    @classmethod
+    def __log_slow_callback(cls, loop, handle, duration):
+        cls._logger.warning(
+            "Executing %s took %.3f seconds", _format_handle(handle), duration
+        )
+
+    # Read draining.
+
+    def set_read_draining(self, enabled, max_bytes=1 << 20, max_time=0.002):
+        """
+        Enable or disable running reader callbacks repeatedly per notification.
+
+        By default a reader callback runs once each time its socket notifier
+        fires, which makes a round trip through the Qt event loop for every
+        datagram, or every read of a stream transport. With draining enabled,
+        the callback is run again while the fd still has data, until about
+        max_bytes have been read or max_time seconds have passed.
+        """
+        self._read_budget = (max_bytes, max_time) if enabled else None
+
+    # Task accounting.
+
+    def set_task_accounting(self, enabled):
+        """
+        Enable or disable attributing the time spent in callbacks to tasks.
+
+        Enabling it starts a new profile. The data collected so far remains
+        available from task_profile() after disabling it.
+        """
+        if not enabled:
+            self.__task_profile = self.__task_stats or self.__task_profile
+            self.__task_stats = None
+        elif self.__task_stats is None:
+            self.__task_stats = {}
+
+    def task_profile(self, limit=None):
+        """
+        Return the top consumers of event loop time, most CPU time first.
+
+        There is an entry per task, named by the task and its coroutine, except
+        for tasks started by asyncSlot, which are grouped by slot name. Entries
+        have the number of handles run and their total wall and CPU time in
+        seconds. Callbacks which do not belong to a task are listed by their own
+        name. The profile keeps the tasks alive until a new one is started.
+        """
+        stats = self.__task_stats or self.__task_profile or {}
+        profile = sorted(
+            (
+                _TaskProfileEntry(name, runs, wall / 1e9, cpu / 1e9)
+                for name, runs, wall, cpu in stats.values()
+            ),
+            key=lambda entry: entry.cpu,
+            reverse=True,
+        )
+        return profile[:limit]
+
     # Debug flag management.
 
     def get_debug(self):
@@ -824,6 +1635,20 @@ else:
 
     QEventLoop = QSelectorEventLoop
 
+from . import _datagram, _process  # noqa: E402
+from ._buffers import (  # noqa: E402
+    BufferPool,
+    PooledBufferedProtocol,
+    qimage_from_buffer,
+)
+from ._pool import QLoopPool  # noqa: E402
+from ._queue import ThreadSafeQueue  # noqa: E402
+from ._signals import signal_stream, wait_signal  # noqa: E402
+from ._tasks import live_tasks, task_scope  # noqa: E402
+from ._tracing import LoopTracer  # noqa: E402
+from ._virtualtime import VirtualTimeQEventLoop  # noqa: E402
+from ._watchdog import LoopWatchdog  # noqa: E402
+
 
 class _Cancellable:
     def __init__(self, timer, loop):
@@ -843,7 +1668,7 @@ def asyncClose(fn):
         assert isinstance(loop, QEventLoop)
         task = loop.create_task(fn(*args, **kwargs))
         while not task.done():
-            QApplication.processEvents(AllEvents)
+            QtCore.QCoreApplication.processEvents(AllEvents)
         try:
             return task.result()
         except asyncio.CancelledError:
@@ -853,7 +1678,13 @@ def asyncClose(fn):
 
 
 def asyncSlot(*args, **kwargs):
-    """Make a Qt async slot run on asyncio loop."""
+    """
+    Make a Qt async slot run on asyncio loop.
+
+    When the slot is a method of a QObject subclass, the task is bound to
+    the receiver with `task_scope` and is cancelled if the receiver is
+    destroyed before the slot finishes.
+    """
 
     async def _error_handler(fn, args, kwargs):
         try:
@@ -862,6 +1693,9 @@ def asyncSlot(*args, **kwargs):
             sys.excepthook(*sys.exc_info())
 
     def outer_decorator(fn):
+        qualname = fn.__qualname__.split(".")
+        is_method = len(qualname) > 1 and qualname[-2] != "<locals>"
+
         @Slot(*args, **kwargs)
         @functools.wraps(fn)
         def wrapper(*args, **kwargs):
@@ -882,7 +1716,13 @@ def asyncSlot(*args, **kwargs):
                             "asyncSlot was not callable from Signal. Potential signature mismatch."
                         )
                 else:
-                    task = asyncio.create_task(_error_handler(fn, args, kwargs))
+                    coro = _error_handler(fn, args, kwargs)
+                    if is_method and args and isinstance(args[0], QtCore.QObject):
+                        task = task_scope(args[0]).create_task(
+                            coro, name=fn.__qualname__
+                        )
+                    else:
+                        task = asyncio.create_task(coro, name=fn.__qualname__)
                     background_tasks.add(task)
                     task.add_done_callback(background_tasks.discard)
                     return
@@ -930,23 +1770,122 @@ async def asyncWrap(fn, *args, **kwargs):
     return await future
 
 
-def _get_qevent_loop():
-    return QEventLoop(QApplication.instance() or QApplication(sys.argv))
+@types.coroutine
+def yield_now():
+    """
+    Let the event loop run other callbacks before resuming the current task.
+
+    This is the cheapest way to yield, the task is queued for the next batch of
+    ready callbacks without any timer or sleep machinery involved. Like
+    `asyncio.sleep(0)`, it works with any event loop.
+    ```python
+    for item in items:
+        process(item)
+        await qasync.yield_now()
+    ```
+    """
+    # a bare yield makes the task reschedule itself with call_soon()
+    yield
+
+
+async def idle():
+    """
+    Wait until Qt has no other events to process.
+
+    Use it to run background work in the spare cycles of the GUI thread.
+    ```python
+    async def warm_cache(paths):
+        for path in paths:
+            await qasync.idle()
+            load_thumbnail(path)
+    ```
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def wakeup():
+        if not future.done():
+            future.set_result(None)
+
+    handle = loop.call_idle(wakeup)
+    try:
+        await future
+    finally:
+        handle.cancel()
+
+
+async def sliced(iterable, budget=0.005):
+    """
+    Iterate over an iterable in chunks, yielding to Qt once per time slice.
+
+    Work which has to run on the GUI thread, such as filling a large item model,
+    freezes the GUI when done in one go, while yielding after every item is slow.
+    sliced() hands out lists of items and only yields control to the event loop
+    once `budget` seconds have been spent producing and processing them. Chunk
+    sizes adapt to the time the consumer takes per item.
+    ```python
+    async for chunk in qasync.sliced(rows):
+        for row in chunk:
+            model.appendRow(row)
+    ```
+    """
+    iterator = iter(iterable)
+    size = 1
+    slice_start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+        now = time.perf_counter()
+        per_item = (now - t0) / len(chunk)
+        if now - slice_start >= budget:
+            await yield_now()
+            slice_start = now = time.perf_counter()
+        # fill the rest of the slice, but at most double the chunk size so a
+        # single slow item cannot blow the budget by much
+        remaining = budget - (now - slice_start)
+        if per_item > 0:
+            size = max(1, min(size * 2, int(remaining / per_item)))
+        else:
+            size *= 2
+
+
+def _get_qevent_loop(app_class=None):
+    app = QtCore.QCoreApplication.instance()
+    if app is None:
+        if app_class is None:
+            app_class = _qt_widgets().QApplication
+        app = app_class(sys.argv)
+    return QEventLoop(app)
 
 
 if sys.version_info >= (3, 12):
 
-    def run(*args, **kwargs):
+    def run(*args, app_class=None, **kwargs):
+        """
+        Run a coroutine on a new QEventLoop, like asyncio.run().
+
+        If no Qt application exists yet, one of app_class is created, a
+        QApplication by default. Pass QtCore.QCoreApplication to run headless
+        services and tools, which work without a display and never load the
+        GUI modules of Qt.
+        """
         return asyncio.run(
             *args,
             **kwargs,
-            loop_factory=_get_qevent_loop,
+            loop_factory=functools.partial(_get_qevent_loop, app_class),
         )
 else:
     # backwards compatibility with event loop policies
     class DefaultQEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+        def __init__(self, app_class=None):
+            super().__init__()
+            self.__app_class = app_class
+
         def new_event_loop(self):
-            return _get_qevent_loop()
+            return _get_qevent_loop(self.__app_class)
 
     @contextlib.contextmanager
     def _set_event_loop_policy(policy):
@@ -957,6 +1896,14 @@ else:
         finally:
             asyncio.set_event_loop_policy(old_policy)
 
-    def run(*args, **kwargs):
-        with _set_event_loop_policy(DefaultQEventLoopPolicy()):
+    def run(*args, app_class=None, **kwargs):
+        """
+        Run a coroutine on a new QEventLoop, like asyncio.run().
+
+        If no Qt application exists yet, one of app_class is created, a
+        QApplication by default. Pass QtCore.QCoreApplication to run headless
+        services and tools, which work without a display and never load the
+        GUI modules of Qt.
+        """
+        with _set_event_loop_policy(DefaultQEventLoopPolicy(app_class)):
             return asyncio.run(*args, **kwargs)
@@ -0,0 +1,105 @@
+"""
+Reusable receive buffers, and Qt objects sharing their memory.
+
+BSD License
+"""
+
+import asyncio
+import collections
+import importlib
+
+from . import QtCore, qt_flavor
+
+
+class BufferPool:
+    """
+    Pool of equally sized, writable memoryviews to receive data into.
+
+    acquire() hands out a free buffer, allocating a new one when none is left,
+    and release() returns it for reuse, keeping at most `count` free buffers.
+    A pool is meant to be used from the thread of its event loop.
+
+    With qbytearray=True the buffers are views of QByteArrays, and `view.obj`
+    is the QByteArray holding the received data, for passing it to Qt without
+    copying. Qt must be done with it before the buffer is released, as writing
+    to the view bypasses the implicit sharing of QByteArray copies.
+    """
+
+    def __init__(self, size, count=8, *, qbytearray=False):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.count = count
+        self.__qbytearray = qbytearray
+        self.__free = collections.deque()
+        if qbytearray:
+            # fail early for bindings without writable QByteArray buffers
+            self.release(self.__allocate())
+
+    def __allocate(self):
+        if not self.__qbytearray:
+            return memoryview(bytearray(self.size))
+        view = memoryview(QtCore.QByteArray(bytes(self.size)))
+        if view.readonly:
+            raise TypeError(f"{qt_flavor} does not support writing into a QByteArray")
+        return view
+
+    def acquire(self):
+        """Return a buffer of `size` bytes, its previous contents are undefined."""
+        if self.__free:
+            return self.__free.pop()
+        return self.__allocate()
+
+    def release(self, buffer):
+        """Return a buffer from acquire() to the pool."""
+        if len(self.__free) < self.count:
+            self.__free.append(buffer)
+
+    def __len__(self):
+        return len(self.__free)
+
+
+class PooledBufferedProtocol(asyncio.BufferedProtocol):
+    """
+    Buffered stream protocol receiving into a buffer taken from a BufferPool.
+
+    Transports read straight into the pooled buffer, and data_received_into()
+    is called with a view of the bytes that arrived. The view is only valid
+    during the call, the memory is reused for the next read. The buffer is
+    acquired on the first read and released when the connection is lost, so
+    connections share the same few buffers instead of allocating per read.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.__buffer = None
+
+    def get_buffer(self, sizehint):
+        if self.__buffer is None:
+            self.__buffer = self.pool.acquire()
+        return self.__buffer
+
+    def buffer_updated(self, nbytes):
+        self.data_received_into(self.__buffer[:nbytes])
+
+    def data_received_into(self, view):
+        """Called with a memoryview of received data, override in subclasses."""
+
+    def connection_lost(self, exc):
+        buffer, self.__buffer = self.__buffer, None
+        if buffer is not None:
+            self.pool.release(buffer)
+
+
+def qimage_from_buffer(buffer, width, height, bytes_per_line, image_format):
+    """
+    Return a QImage using the memory of a writable buffer, without copying.
+
+    The image keeps a reference to the buffer, changes to the buffer show in
+    the image until Qt detaches it, e.g. on painting into the image.
+    """
+    QtGui = importlib.import_module(f"{qt_flavor}.QtGui")
+    image = QtGui.QImage(buffer, width, height, bytes_per_line, image_format)
+    # QImage does not own external memory
+    image._qasync_buffer = buffer
+    return image
@@ -22,3 +22,50 @@ def with_logger(cls):
         raise AssertionError
     setattr(cls, attr_name, logging.getLogger(cls_name))
     return cls
+
+
+class _RingBuffer:
+    """Fixed-capacity FIFO backed by a preallocated list."""
+
+    __slots__ = ("_items", "_head", "_size")
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._items = [None] * capacity
+        self._head = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._items)
+
+    def full(self):
+        return self._size == len(self._items)
+
+    def append(self, item):
+        """Append an item, the caller must make sure the buffer is not full."""
+        items = self._items
+        items[(self._head + self._size) % len(items)] = item
+        self._size += 1
+
+    def popleft(self):
+        if not self._size:
+            raise IndexError("pop from an empty ring buffer")
+        items = self._items
+        item = items[self._head]
+        # drop the reference so that the slot does not keep the item alive
+        items[self._head] = None
+        self._head = (self._head + 1) % len(items)
+        self._size -= 1
+        return item
+
+    def clear(self):
+        items = self._items
+        for i in range(len(items)):
+            items[i] = None
+        self._head = 0
+        self._size = 0
@@ -0,0 +1,84 @@
+"""
+Datagram transport receiving several datagrams per socket notification.
+
+BSD License
+"""
+
+from asyncio import selector_events
+
+
+class BatchedDatagramTransport(selector_events._SelectorDatagramTransport):
+    """
+    Selector datagram transport reading up to `batch_size` datagrams at once.
+
+    Each time the socket becomes readable, datagrams are received into a
+    buffer taken from a BufferPool until the socket would block or the
+    batch is full, instead of one recvfrom() of max_size bytes per notifier
+    activation. Protocols defining datagrams_received(datagrams) get the whole
+    batch as a list of (data, addr) tuples, others get datagram_received()
+    for each datagram in turn.
+    """
+
+    def __init__(
+        self,
+        loop,
+        sock,
+        protocol,
+        address=None,
+        waiter=None,
+        extra=None,
+        *,
+        batch_size,
+        buffers,
+    ):
+        super().__init__(loop, sock, protocol, address, waiter, extra)
+        self._batch_size = batch_size
+        self._buffers = buffers
+        self._recv_buffer = buffers.acquire()
+
+    def _read_ready(self):
+        if self._conn_lost:
+            return
+        recvfrom_into = self._sock.recvfrom_into
+        buffer = self._recv_buffer
+        datagrams = []
+        error = fatal = None
+        try:
+            for _ in range(self._batch_size):
+                nbytes, addr = recvfrom_into(buffer)
+                datagrams.append((bytes(buffer[:nbytes]), addr))
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as exc:
+            error = exc
+        except (SystemExit, KeyboardInterrupt):
+            raise
+        except BaseException as exc:
+            fatal = exc
+
+        if datagrams:
+            self._deliver(datagrams)
+        if error is not None:
+            self._protocol.error_received(error)
+        elif fatal is not None:
+            self._fatal_error(fatal, "Fatal read error on datagram transport")
+
+    def _call_connection_lost(self, exc):
+        try:
+            super()._call_connection_lost(exc)
+        finally:
+            buffer, self._recv_buffer = self._recv_buffer, None
+            if buffer is not None:
+                self._buffers.release(buffer)
+
+    def _deliver(self, datagrams):
+        protocol = self._protocol
+        datagrams_received = getattr(protocol, "datagrams_received", None)
+        if datagrams_received is not None:
+            datagrams_received(datagrams)
+            return
+        for data, addr in datagrams:
+            # the protocol may close the transport on any datagram
+            if self._closing:
+                break
+            protocol.datagram_received(data, addr)
@@ -0,0 +1,155 @@
+"""
+Pool of event loops running in their own QThreads.
+
+BSD License
+"""
+
+import asyncio
+import inspect
+import itertools
+import threading
+
+from . import QEventLoop, QtCore
+from ._common import with_logger
+
+_PLACEMENTS = ("round_robin", "least_loaded")
+
+
+class _LoopThread(QtCore.QThread):
+    """QThread running a QEventLoop until the pool shuts it down."""
+
+    def __init__(self, loop_kwargs):
+        super().__init__()
+        self.loop = None
+        self.error = None
+        self.load = 0
+        self.__loop_kwargs = loop_kwargs
+        self.__started = threading.Event()
+
+    def run(self):
+        try:
+            # parent for the loop's helper objects, which must live in this thread
+            owner = QtCore.QObject()
+            loop = QEventLoop(self, qtparent=owner, **self.__loop_kwargs)
+        except BaseException as exc:
+            # reported by QLoopPool.__init__
+            self.error = exc
+            return
+        finally:
+            self.__started.set()
+        self.loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+    def wait_started(self):
+        self.__started.wait()
+
+
+@with_logger
+class QLoopPool:
+    """
+    Pool of QEventLoops, each running in its own QThread.
+
+    submit() schedules a coroutine on one of the loops and returns a
+    concurrent.futures.Future, which can be waited for from any thread or
+    awaited from another event loop with asyncio.wrap_future(). With the
+    "round_robin" placement, loops take turns, with "least_loaded" the loop
+    with the fewest unfinished coroutines of the pool is chosen. Keyword
+    arguments not used by the pool are passed to each QEventLoop.
+
+    A QCoreApplication or QApplication must exist before the pool is created.
+
+    >>> with QLoopPool(4) as pool:  # doctest: +SKIP
+    ...     future = pool.submit(fetch(url))
+    ...     data = await asyncio.wrap_future(future)
+    """
+
+    def __init__(self, size, placement="round_robin", **loop_kwargs):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if placement not in _PLACEMENTS:
+            raise ValueError(
+                f"placement must be one of {', '.join(_PLACEMENTS)}, not {placement!r}"
+            )
+        # unknown arguments fail here rather than in every thread
+        inspect.signature(QEventLoop).bind(None, qtparent=None, **loop_kwargs)
+        self.__placement = placement
+        self.__lock = threading.Lock()
+        self.__shutdown = False
+        self.__threads = [_LoopThread(loop_kwargs) for _ in range(size)]
+        self.__next_thread = itertools.cycle(self.__threads)
+        for thread in self.__threads:
+            thread.start()
+        for thread in self.__threads:
+            thread.wait_started()
+        errors = [thread.error for thread in self.__threads if thread.error]
+        if errors:
+            self.shutdown()
+            raise errors[0]
+
+    @property
+    def loops(self):
+        """The event loops of the pool."""
+        return [thread.loop for thread in self.__threads]
+
+    def loads(self):
+        """Return the number of unfinished submitted coroutines per loop."""
+        with self.__lock:
+            return [thread.load for thread in self.__threads]
+
+    def submit(self, coro):
+        """Run a coroutine on one of the loops, return a concurrent Future."""
+        with self.__lock:
+            if self.__shutdown:
+                coro.close()
+                raise RuntimeError("QLoopPool has been shut down")
+            if self.__placement == "round_robin":
+                thread = next(self.__next_thread)
+            else:
+                thread = min(self.__threads, key=lambda thread: thread.load)
+            thread.load += 1
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, thread.loop)
+        except BaseException:
+            self.__finished(thread)
+            raise
+        future.add_done_callback(lambda _: self.__finished(thread))
+        return future
+
+    def __finished(self, thread):
+        with self.__lock:
+            thread.load -= 1
+
+    def shutdown(self, wait=True):
+        """
+        Stop the loops, cancelling coroutines which are still running.
+
+        With wait=True, return once all threads have finished.
+        """
+        with self.__lock:
+            if self.__shutdown:
+                return
+            self.__shutdown = True
+        self._logger.debug("Shutting down %d loops", len(self.__threads))
+        for thread in self.__threads:
+            if thread.loop is not None:
+                thread.loop.call_soon_threadsafe(thread.loop.stop)
+        if wait:
+            for thread in self.__threads:
+                thread.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -0,0 +1,368 @@
+"""
+Subprocess transport driven by QProcess signals.
+
+BSD License
+"""
+
+import asyncio
+import errno
+import os
+import shutil
+import signal
+import subprocess
+import sys
+
+from . import QtCore
+from ._common import with_logger
+
+QProcess = QtCore.QProcess
+# Qt5/Qt6 compatibility
+_ChannelMode = getattr(QProcess, "ProcessChannelMode", QProcess)
+_InputChannelMode = getattr(QProcess, "InputChannelMode", QProcess)
+_ExitStatus = getattr(QProcess, "ExitStatus", QProcess)
+_ProcessError = getattr(QProcess, "ProcessError", QProcess)
+
+# stdout and stderr handling -> QProcess channel mode, other combinations
+# are left to asyncio
+_CHANNEL_MODES = {
+    (subprocess.PIPE, subprocess.PIPE): _ChannelMode.SeparateChannels,
+    (subprocess.PIPE, subprocess.DEVNULL): _ChannelMode.SeparateChannels,
+    (subprocess.DEVNULL, subprocess.PIPE): _ChannelMode.SeparateChannels,
+    (subprocess.DEVNULL, subprocess.DEVNULL): _ChannelMode.SeparateChannels,
+    (subprocess.PIPE, None): _ChannelMode.ForwardedErrorChannel,
+    (subprocess.DEVNULL, None): _ChannelMode.ForwardedErrorChannel,
+    (None, subprocess.PIPE): _ChannelMode.ForwardedOutputChannel,
+    (None, subprocess.DEVNULL): _ChannelMode.ForwardedOutputChannel,
+    (None, None): _ChannelMode.ForwardedChannels,
+    (subprocess.PIPE, subprocess.STDOUT): _ChannelMode.MergedChannels,
+    (subprocess.DEVNULL, subprocess.STDOUT): _ChannelMode.MergedChannels,
+}
+_SUPPORTED_STDIN = (subprocess.PIPE, subprocess.DEVNULL, None)
+_SUPPORTED_KWARGS = {"cwd", "env"}
+
+# transports of running processes, which must stay alive until they finished
+_running = set()
+
+
+def supports(shell, stdin, stdout, stderr, kwargs):
+    """Return whether a subprocess with these arguments can use QProcess."""
+    return (
+        (not shell or os.name == "posix")
+        and stdin in _SUPPORTED_STDIN
+        and (stdout, stderr) in _CHANNEL_MODES
+        and not set(kwargs) - _SUPPORTED_KWARGS
+    )
+
+
+class _PipeTransport:
+    def __init__(self, transport, fd):
+        self._transport = transport
+        self._fd = fd
+        self._closing = False
+
+    def get_extra_info(self, name, default=None):
+        return self._transport.get_extra_info(name, default)
+
+    def is_closing(self):
+        return self._closing
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} fd={self._fd} {self._transport!r}>"
+
+
+class _ReadPipeTransport(_PipeTransport, asyncio.ReadTransport):
+    def __init__(self, transport, fd):
+        super().__init__(transport, fd)
+        self._paused = False
+
+    def is_reading(self):
+        return not self._paused and not self._closing
+
+    def pause_reading(self):
+        # QProcess keeps buffering the output, we just stop handing it out
+        self._paused = True
+
+    def resume_reading(self):
+        if self._paused:
+            self._paused = False
+            self._transport._read(self._fd)
+
+    def close(self):
+        self._closing = True
+
+
+class _WritePipeTransport(_PipeTransport, asyncio.WriteTransport):
+    def __init__(self, transport, fd):
+        super().__init__(transport, fd)
+        self.set_write_buffer_limits()
+
+    def write(self, data):
+        if self._closing:
+            return
+        self._transport._write(data)
+
+    def can_write_eof(self):
+        return True
+
+    def write_eof(self):
+        self.close()
+
+    def close(self):
+        if not self._closing:
+            self._closing = True
+            self._transport._close_stdin()
+
+    def abort(self):
+        self.close()
+
+    def get_write_buffer_size(self):
+        return self._transport._bytes_to_write()
+
+    def get_write_buffer_limits(self):
+        return self._low, self._high
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        if high is None:
+            high = 64 * 1024 if low is None else 4 * low
+        if low is None:
+            low = high // 4
+        if not high >= low >= 0:
+            raise ValueError(f"high ({high!r}) must be >= low ({low!r}) must be >= 0")
+        self._high = high
+        self._low = low
+
+
+@with_logger
+class QProcessTransport(asyncio.SubprocessTransport):
+    """
+    asyncio subprocess transport running the child with QProcess.
+
+    Output, exit and write progress are delivered by QProcess signals, so no
+    child watcher thread or pipe notifiers are needed. QEventLoop uses it when
+    created with use_qprocess=True, for subprocesses whose standard streams
+    are pipes, DEVNULL or inherited and which only set cwd and env.
+    """
+
+    def __init__(
+        self, loop, protocol, program, arguments, stdin, stdout, stderr, cwd, env
+    ):
+        self._loop = loop
+        self._protocol = protocol
+        self._closed = False
+        self._returncode = None
+        self._exit_waiters = []
+        self._pid = None
+        self._writing_paused = False
+
+        self._process = process = QProcess()
+        process.setProgram(program)
+        process.setArguments(arguments)
+        if cwd is not None:
+            process.setWorkingDirectory(os.fspath(cwd))
+        if env is not None:
+            environment = QtCore.QProcessEnvironment()
+            for key, value in env.items():
+                environment.insert(key, value)
+            process.setProcessEnvironment(environment)
+
+        process.setProcessChannelMode(_CHANNEL_MODES[stdout, stderr])
+        if stdin is None:
+            process.setInputChannelMode(_InputChannelMode.ForwardedInputChannel)
+        elif stdin == subprocess.DEVNULL:
+            process.setStandardInputFile(QProcess.nullDevice())
+        if stdout == subprocess.DEVNULL:
+            process.setStandardOutputFile(QProcess.nullDevice())
+        if stderr == subprocess.DEVNULL:
+            process.setStandardErrorFile(QProcess.nullDevice())
+
+        self._pipes = {
+            0: _WritePipeTransport(self, 0) if stdin == subprocess.PIPE else None,
+            1: _ReadPipeTransport(self, 1) if stdout == subprocess.PIPE else None,
+            2: _ReadPipeTransport(self, 2) if stderr == subprocess.PIPE else None,
+        }
+
+        process.readyReadStandardOutput.connect(lambda: self._read(1))
+        process.readyReadStandardError.connect(lambda: self._read(2))
+        process.bytesWritten.connect(self._on_bytes_written)
+        process.finished.connect(self._on_finished)
+
+    def _start(self):
+        process = self._process
+        process.start()
+        # like subprocess.Popen, this only waits for the exec to succeed or fail
+        if not process.waitForStarted(-1):
+            message = process.errorString()
+            program = process.program()
+            self._process = None
+            process.deleteLater()
+            if process.error() == _ProcessError.FailedToStart:
+                if shutil.which(program) is None:
+                    raise FileNotFoundError(errno.ENOENT, message, program)
+                raise PermissionError(errno.EACCES, message, program)
+            raise OSError(message)
+        self._pid = process.processId()
+        _running.add(self)
+        self._protocol.connection_made(self)
+
+    def __repr__(self):
+        info = [self.__class__.__name__]
+        if self._closed:
+            info.append("closed")
+        info.append(f"pid={self.get_pid()}")
+        if self._returncode is not None:
+            info.append(f"returncode={self._returncode}")
+        return "<{}>".format(" ".join(info))
+
+    def get_extra_info(self, name, default=None):
+        if name == "subprocess" and self._process is not None:
+            return self._process
+        return default
+
+    def get_pid(self):
+        return self._pid
+
+    def get_returncode(self):
+        return self._returncode
+
+    def get_pipe_transport(self, fd):
+        return self._pipes.get(fd)
+
+    def is_closing(self):
+        return self._closed
+
+    def _check_proc(self):
+        # like asyncio, refuse once the process exited and the transport closed
+        if self._closed and self._returncode is not None:
+            raise ProcessLookupError()
+
+    def send_signal(self, sig):
+        self._check_proc()
+        if self._returncode is not None:
+            return
+        if sys.platform == "win32" or sig not in (signal.SIGTERM, signal.SIGKILL):
+            os.kill(self.get_pid(), sig)
+        elif sig == signal.SIGTERM:
+            self._process.terminate()
+        else:
+            self._process.kill()
+
+    def terminate(self):
+        self._check_proc()
+        if self._returncode is None:
+            self._process.terminate()
+
+    def kill(self):
+        self._check_proc()
+        if self._returncode is None:
+            self._process.kill()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for pipe in self._pipes.values():
+            if pipe is not None:
+                pipe.close()
+        if self._returncode is None:
+            if self._loop.get_debug():
+                self._logger.warning("Close running child process: kill %r", self)
+            self._process.kill()
+
+    async def _wait(self):
+        """Wait until the process exits and return its return code."""
+        if self._returncode is not None:
+            return self._returncode
+        waiter = self._loop.create_future()
+        self._exit_waiters.append(waiter)
+        return await waiter
+
+    def _read(self, fd):
+        pipe = self._pipes[fd]
+        if pipe is None or pipe._paused or self._process is None:
+            return
+        if fd == 1:
+            data = bytes(self._process.readAllStandardOutput())
+        else:
+            data = bytes(self._process.readAllStandardError())
+        if data:
+            self._loop._call_soon(self._protocol.pipe_data_received, (fd, data))
+
+    def _write(self, data):
+        if self._process is None:
+            return
+        self._process.write(bytes(data))
+        pipe = self._pipes[0]
+        if not self._writing_paused and self._bytes_to_write() > pipe._high:
+            self._writing_paused = True
+            self._protocol.pause_writing()
+
+    def _bytes_to_write(self):
+        if self._process is None:
+            return 0
+        return self._process.bytesToWrite()
+
+    def _on_bytes_written(self, count):
+        if self._writing_paused and self._bytes_to_write() <= self._pipes[0]._low:
+            self._writing_paused = False
+            self._loop._call_soon(self._protocol.resume_writing, ())
+
+    def _close_stdin(self):
+        if self._process is not None:
+            self._process.closeWriteChannel()
+        self._loop._call_soon(self._protocol.pipe_connection_lost, (0, None))
+
+    def _on_finished(self, code, *args):
+        process = self._process
+        # the output which came with the exit has not been handed out yet
+        for fd in (1, 2):
+            pipe = self._pipes[fd]
+            if pipe is not None:
+                pipe._paused = False
+                self._read(fd)
+        if process.exitStatus() == _ExitStatus.CrashExit and sys.platform != "win32":
+            # the exit code is the signal which killed the process
+            code = -code
+        self._loop._call_soon(self._process_exited, (code,))
+
+    def _process_exited(self, returncode):
+        self._returncode = returncode
+        # like the pipes of asyncio transports, the process is released once it
+        # exited, and the accessors using it turn into no-ops
+        process, self._process = self._process, None
+        process.deleteLater()
+        if self._loop.get_debug():
+            self._logger.info("%r exited with return code %r", self, returncode)
+        stdin = self._pipes[0]
+        if stdin is not None and not stdin._closing:
+            stdin._closing = True
+            self._protocol.pipe_connection_lost(0, None)
+        for fd in (1, 2):
+            if self._pipes[fd] is not None:
+                self._protocol.pipe_connection_lost(fd, None)
+        self._protocol.process_exited()
+        for waiter in self._exit_waiters:
+            if not waiter.done():
+                waiter.set_result(returncode)
+        self._exit_waiters.clear()
+        _running.discard(self)
+
+
+async def make_transport(loop, protocol, args, shell, stdin, stdout, stderr, kwargs):
+    """Start a process with QProcess and return its connected transport."""
+    if shell:
+        program, arguments = "/bin/sh", ["-c", args]
+    else:
+        program, *arguments = [os.fsdecode(arg) for arg in args]
+    transport = QProcessTransport(
+        loop,
+        protocol,
+        program,
+        arguments,
+        stdin,
+        stdout,
+        stderr,
+        kwargs.get("cwd"),
+        kwargs.get("env"),
+    )
+    transport._start()
+    return transport
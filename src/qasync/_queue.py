@@ -0,0 +1,178 @@
+"""
+Queue passing items from any thread to coroutines of one event loop.
+
+BSD License
+"""
+
+import asyncio
+import collections
+import threading
+
+
+def _set_result_unless_done(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ThreadSafeQueue:
+    """
+    FIFO queue filled from any thread and consumed by coroutines of one loop.
+
+    put_nowait() may be called from any thread. Consumers await get() or
+    get_batch() on the loop which first waits for items. Producers wake up
+    that loop at most once until the consumers ran, however many items they
+    add in between, so a burst of items costs a single cross-thread call
+    instead of one call_soon_threadsafe() per item.
+
+    With a maxsize, put_nowait() raises asyncio.QueueFull when the queue is
+    full. put() blocks the calling thread and await put_async() suspends the
+    calling coroutine, on any loop, until there is room.
+    """
+
+    def __init__(self, maxsize=0):
+        self._maxsize = maxsize
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._loop = None
+        self._getters = []
+        self._async_putters = []
+        self._wakeup_pending = False
+        # number of times the consumer loop was woken up
+        self.wakeups = 0
+
+    def __repr__(self):
+        return f"<{type(self).__name__} maxsize={self._maxsize!r} qsize={self.qsize()}>"
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def full(self):
+        return 0 < self._maxsize <= len(self._items)
+
+    # producers
+
+    def put_nowait(self, item):
+        """Add an item without blocking, from any thread."""
+        with self._lock:
+            if self.full():
+                raise asyncio.QueueFull
+            wake = self._append(item)
+        if wake:
+            self._loop.call_soon_threadsafe(self._wake_getters)
+
+    def put(self, item, timeout=None):
+        """
+        Add an item, blocking the calling thread while the queue is full.
+
+        Raises asyncio.QueueFull if there is still no room after timeout
+        seconds. Must not be called from the thread of the consuming loop.
+        """
+        with self._not_full:
+            if not self._not_full.wait_for(lambda: not self.full(), timeout):
+                raise asyncio.QueueFull
+            wake = self._append(item)
+        if wake:
+            self._loop.call_soon_threadsafe(self._wake_getters)
+
+    def _append(self, item):
+        # called with the lock held, returns whether the consumer must be woken
+        self._items.append(item)
+        if not self._getters or self._wakeup_pending:
+            return False
+        self._wakeup_pending = True
+        self.wakeups += 1
+        return True
+
+    async def put_async(self, item):
+        """Add an item, suspending the calling coroutine while the queue is full."""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                return self.put_nowait(item)
+            except asyncio.QueueFull:
+                pass
+            waiter = loop.create_future()
+            with self._lock:
+                if self.full():
+                    self._async_putters.append((loop, waiter))
+                else:
+                    waiter.set_result(None)
+            await waiter
+
+    # consumers
+
+    def get_nowait(self):
+        """Remove and return an item, raise asyncio.QueueEmpty if there is none."""
+        with self._lock:
+            if not self._items:
+                raise asyncio.QueueEmpty
+            item = self._items.popleft()
+            self._notify_putters()
+        return item
+
+    async def get(self):
+        """Remove and return an item, waiting until one is available."""
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                await self._wait_for_items()
+
+    async def get_batch(self, max_items=None):
+        """Remove and return a list of at least one and at most max_items items."""
+        if max_items is not None and max_items < 1:
+            raise ValueError("max_items must be at least 1")
+        while True:
+            with self._lock:
+                items = self._items
+                if items:
+                    if max_items is None or max_items >= len(items):
+                        batch = list(items)
+                        items.clear()
+                    else:
+                        batch = [items.popleft() for _ in range(max_items)]
+                    self._notify_putters(len(batch))
+                    return batch
+            await self._wait_for_items()
+
+    async def _wait_for_items(self):
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            if self._loop is None:
+                self._loop = loop
+            elif self._loop is not loop:
+                raise RuntimeError(f"{self!r} is consumed by another event loop")
+            if self._items:
+                return
+            self._getters.append(waiter)
+        try:
+            await waiter
+        finally:
+            with self._lock:
+                if waiter in self._getters:
+                    self._getters.remove(waiter)
+
+    def _wake_getters(self):
+        with self._lock:
+            self._wakeup_pending = False
+            getters, self._getters = self._getters, []
+        for waiter in getters:
+            _set_result_unless_done(waiter)
+
+    def _notify_putters(self, count=1):
+        # called with the lock held
+        if self._maxsize <= 0:
+            return
+        self._not_full.notify(count)
+        putters, self._async_putters = self._async_putters, []
+        for loop, waiter in putters:
+            loop.call_soon_threadsafe(_set_result_unless_done, waiter)
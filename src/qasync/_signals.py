@@ -0,0 +1,180 @@
+"""
+Adapters for consuming Qt signals from coroutines.
+
+BSD License
+"""
+
+import asyncio
+import threading
+import weakref
+
+from . import QtCore
+from ._common import _RingBuffer
+
+_OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+# Qt5/Qt6 compatibility
+_DirectConnection = getattr(QtCore.Qt, "ConnectionType", QtCore.Qt).DirectConnection
+
+
+def _disconnect(signal, slot):
+    try:
+        signal.disconnect(slot)
+    except (RuntimeError, TypeError):  # pragma: no cover
+        # the sender has already been deleted or the slot was never connected
+        pass
+
+
+class _SignalStream:
+    """
+    Async iterator over the emissions of a Qt signal.
+
+    Use `signal_stream()` to create instances.
+    """
+
+    def __init__(self, signal, maxsize, overflow):
+        if overflow not in _OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow must be one of {', '.join(_OVERFLOW_POLICIES)}, "
+                f"not {overflow!r}"
+            )
+        self.__loop = asyncio.get_running_loop()
+        self.__thread_id = threading.get_ident()
+        self.__buffer = _RingBuffer(maxsize)
+        self.__overflow = overflow
+        self.__not_full = threading.Condition(threading.Lock())
+        self.__waiter = None
+        self.__wakeup_pending = False
+        self.__closed = False
+        self.dropped = 0
+
+        # The slot only holds a weak reference to the stream, so that a stream
+        # which is abandoned without being closed can still be collected, which
+        # disconnects it from the signal. It is connected directly so that it
+        # runs in the emitting thread, which is what allows "block" to apply
+        # backpressure instead of Qt queueing emissions without bound.
+        ref = weakref.ref(self)
+
+        def slot(*args):
+            stream = ref()
+            if stream is not None:
+                stream._push(args)
+
+        signal.connect(slot, _DirectConnection)
+        self.__finalizer = weakref.finalize(self, _disconnect, signal, slot)
+
+    def _push(self, args):
+        on_loop_thread = threading.get_ident() == self.__thread_id
+        with self.__not_full:
+            if self.__closed:
+                return
+            buffer = self.__buffer
+            if buffer.full():
+                if self.__overflow == "block" and not on_loop_thread:
+                    while buffer.full() and not self.__closed:
+                        self.__not_full.wait()
+                    if self.__closed:
+                        return
+                elif self.__overflow == "drop_oldest":
+                    buffer.popleft()
+                    self.dropped += 1
+                else:
+                    # Blocking the thread which runs the event loop would
+                    # deadlock, so "block" degrades to "drop_newest" there.
+                    self.dropped += 1
+                    return
+            buffer.append(args)
+            if self.__waiter is None or self.__wakeup_pending:
+                return
+            self.__wakeup_pending = True
+
+        if on_loop_thread:
+            self.__wakeup()
+        else:
+            self.__loop.call_soon_threadsafe(self.__wakeup)
+
+    def __wakeup(self):
+        with self.__not_full:
+            self.__wakeup_pending = False
+            waiter = self.__waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def close(self):
+        """Disconnect from the signal and end the iteration."""
+        self.__finalizer()
+        with self.__not_full:
+            self.__closed = True
+            self.__not_full.notify_all()
+            waiter = self.__waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    @property
+    def closed(self):
+        return self.__closed
+
+    def __len__(self):
+        return len(self.__buffer)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            with self.__not_full:
+                if self.__buffer:
+                    args = self.__buffer.popleft()
+                    self.__not_full.notify()
+                    return args
+                if self.__closed:
+                    raise StopAsyncIteration
+                self.__waiter = waiter = self.__loop.create_future()
+            try:
+                await waiter
+            finally:
+                with self.__not_full:
+                    self.__waiter = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+def signal_stream(signal, maxsize=64, overflow="drop_oldest"):
+    """
+    Iterate asynchronously over the emissions of a Qt signal.
+
+    Each emission is yielded as a tuple of the signal arguments. At most
+    `maxsize` emissions are buffered, when the buffer is full `overflow`
+    decides what happens to a new emission:
+
+    - "drop_oldest": discard the oldest buffered emission
+    - "drop_newest": discard the new emission
+    - "block": block the emitting thread until there is room. Emissions
+      from the thread running the event loop cannot block and are dropped.
+
+    The number of discarded emissions is available as `stream.dropped`.
+    The stream disconnects from the signal when closed, either explicitly
+    with `close()`, by leaving an `async with` block or when it is garbage
+    collected.
+
+    >>> async def log_clicks(button):
+    ...     async with signal_stream(button.clicked, maxsize=16) as clicks:
+    ...         async for (checked,) in clicks:
+    ...             print("clicked", checked)
+    """
+    return _SignalStream(signal, maxsize, overflow)
+
+
+async def wait_signal(signal, timeout=None):
+    """
+    Wait for the next emission of a Qt signal and return its arguments as a tuple.
+
+    Raises `asyncio.TimeoutError` if the signal is not emitted within `timeout`
+    seconds. The signal is disconnected in either case.
+    """
+    async with signal_stream(signal, maxsize=1) as stream:
+        return await asyncio.wait_for(stream.__anext__(), timeout)
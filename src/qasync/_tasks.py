@@ -0,0 +1,110 @@
+"""
+Binding of asyncio tasks to the lifetime of QObjects.
+
+BSD License
+"""
+
+import asyncio
+import threading
+import weakref
+
+from ._common import with_logger
+
+# owner QObject -> _TaskScope
+_scopes = weakref.WeakKeyDictionary()
+
+
+@with_logger
+class _TaskScope:
+    """
+    Group of tasks which are cancelled when their owner QObject is destroyed.
+
+    Use `task_scope()` to create instances.
+    """
+
+    def __init__(self, owner):
+        self.__owner = weakref.ref(owner)
+        self.__loop = asyncio.get_running_loop()
+        self.__thread_id = threading.get_ident()
+        self.__tasks = set()
+        self.__closed = False
+        owner.destroyed.connect(self.__on_destroyed)
+
+    @property
+    def owner(self):
+        """The owner QObject, or None once it has been garbage collected."""
+        return self.__owner()
+
+    @property
+    def closed(self):
+        return self.__closed
+
+    @property
+    def loop(self):
+        """The event loop on which the tasks of this scope run."""
+        return self.__loop
+
+    @property
+    def tasks(self):
+        """The tasks of this scope which have not finished yet."""
+        return [task for task in self.__tasks if not task.done()]
+
+    def create_task(self, coro, *, name=None):
+        """Schedule a coroutine as a task owned by this scope."""
+        if self.__closed:
+            coro.close()
+            raise RuntimeError("Task scope owner has been destroyed")
+        task = self.__loop.create_task(coro, name=name)
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+        return task
+
+    def cancel(self):
+        """Cancel all outstanding tasks and refuse new ones."""
+        self.__closed = True
+        tasks, self.__tasks = self.__tasks, set()
+        for task in tasks:
+            if not task.done():
+                self._logger.debug("Cancelling %r of destroyed owner", task)
+                task.cancel()
+
+    def __on_destroyed(self, *args):
+        # The owner may be deleted from any thread, while tasks may only be
+        # cancelled from the thread running their loop.
+        if threading.get_ident() == self.__thread_id:
+            self.cancel()
+        elif not self.__loop.is_closed():
+            self.__loop.call_soon_threadsafe(self.cancel)
+
+
+def task_scope(obj):
+    """
+    Return the task scope bound to a QObject.
+
+    Tasks created with `task_scope(obj).create_task(coro)` are cancelled when
+    `obj` emits `destroyed`, so they cannot keep working on (and keep alive) a
+    widget that has been closed and deleted. Tasks started by `asyncSlot`
+    methods of QObject subclasses are bound to their receiver automatically.
+
+    Must be called from a coroutine or callback running on the event loop. An
+    object which outlives its loop gets a new scope on the loop running now.
+    """
+    scope = _scopes.get(obj)
+    if scope is None or scope.closed or scope.loop is not asyncio.get_running_loop():
+        scope = _scopes[obj] = _TaskScope(obj)
+    return scope
+
+
+def live_tasks():
+    """
+    Return the unfinished tasks bound to each QObject which is still alive.
+
+    The result maps owner objects to lists of tasks. This is meant as a
+    debugging aid to find tasks which outlive their widgets.
+    """
+    result = {}
+    for owner, scope in list(_scopes.items()):
+        tasks = scope.tasks
+        if tasks and not scope.closed:
+            result[owner] = tasks
+    return result
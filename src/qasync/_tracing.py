@@ -0,0 +1,120 @@
+"""
+Recording of event loop activity in the Chrome trace event format.
+
+BSD License
+"""
+
+import itertools
+import json
+import os
+import threading
+import time
+
+# the tracer which is currently recording, checked by the instrumented code paths
+active_tracer = None
+
+
+class LoopTracer:
+    """
+    Record what the event loops and QThreadExecutor workers are doing.
+
+    While started, the tracer records every handle run, socket notifier
+    activation, timer event, thread-safe wakeup and executor job of the process
+    into a preallocated ring buffer holding the last `capacity` events. The
+    recording can be exported as Chrome trace JSON, to be opened in Perfetto
+    or chrome://tracing, with one track per thread.
+
+    >>> with LoopTracer() as tracer:  # doctest: +SKIP
+    ...     loop.run_until_complete(main())
+    >>> tracer.dump("trace.json")  # doctest: +SKIP
+    """
+
+    def __init__(self, capacity=65536):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.__events = [None] * capacity
+        # next() on itertools.count is atomic, so threads can record
+        # concurrently without a lock
+        self.__counter = itertools.count()
+        self.__thread_names = {}
+        self.__pid = os.getpid()
+
+    def start(self):
+        """Start recording, replacing any other active tracer."""
+        global active_tracer
+        active_tracer = self
+
+    def stop(self):
+        global active_tracer
+        if active_tracer is self:
+            active_tracer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def clear(self):
+        events = self.__events
+        for i in range(len(events)):
+            events[i] = None
+        self.__counter = itertools.count()
+
+    def name_thread(self, name):
+        """Name the track of the calling thread in the exported trace."""
+        self.__thread_names[threading.get_ident()] = name
+
+    def complete(self, name, cat, start_ns, end_ns, args=None):
+        """Record an event which lasted from start_ns to end_ns (perf_counter_ns)."""
+        self.__record(("X", name, cat, start_ns, end_ns - start_ns, args))
+
+    def instant(self, name, cat, args=None):
+        """Record an event without duration which happens now."""
+        self.__record(("i", name, cat, time.perf_counter_ns(), 0, args))
+
+    def __record(self, event):
+        tid = threading.get_ident()
+        if tid not in self.__thread_names:
+            self.__thread_names[tid] = threading.current_thread().name
+        events = self.__events
+        events[next(self.__counter) % len(events)] = (tid,) + event
+
+    def events(self):
+        """Return the recorded events in the Chrome trace event format."""
+        pid = self.__pid
+        result = [
+            {
+                "ph": "M",
+                "name": "thread_name",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in list(self.__thread_names.items())
+        ]
+        recorded = [event for event in self.__events if event is not None]
+        recorded.sort(key=lambda event: event[4])
+        for tid, ph, name, cat, ts, dur, args in recorded:
+            event = {"ph": ph, "name": name, "cat": cat, "pid": pid, "tid": tid}
+            event["ts"] = ts / 1000
+            if ph == "X":
+                event["dur"] = dur / 1000
+            else:
+                event["s"] = "t"
+            if args:
+                event["args"] = args
+            result.append(event)
+        return result
+
+    def to_json(self):
+        return json.dumps({"traceEvents": self.events(), "displayTimeUnit": "ms"})
+
+    def dump(self, file):
+        """Write the trace as JSON to a path or a text file object."""
+        if hasattr(file, "write"):
+            file.write(self.to_json())
+        else:
+            with open(file, "w") as f:
+                f.write(self.to_json())
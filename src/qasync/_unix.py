@@ -13,7 +13,7 @@ import collections
 import itertools
 import selectors
 
-from . import QtCore, _fileno, with_logger
+from . import QtCore, _fileno, _tracing, with_logger
 
 EVENT_READ = 1 << 0
 EVENT_WRITE = 1 << 1
@@ -109,12 +109,18 @@ class _Selector(selectors.BaseSelector):
 
     def __on_read_activated(self, fd):
         self._logger.debug("File %s ready to read", fd)
+        tracer = _tracing.active_tracer
+        if tracer is not None:
+            tracer.instant("read notifier", "notifier", {"fd": fd})
         key = self._key_from_fd(fd)
         if key:
             self.__parent._process_event(key, EVENT_READ & key.events)
 
     def __on_write_activated(self, fd):
         self._logger.debug("File %s ready to write", fd)
+        tracer = _tracing.active_tracer
+        if tracer is not None:
+            tracer.instant("write notifier", "notifier", {"fd": fd})
         key = self._key_from_fd(fd)
         if key:
             self.__parent._process_event(key, EVENT_WRITE & key.events)
@@ -224,10 +230,10 @@ class _SelectorEventLoop(asyncio.SelectorEventLoop):
                 self.remove_reader(fileobj)
             else:
                 self._logger.debug("Invoking reader callback: %s", reader)
-                reader._run()
+                self._run_handle(reader)
         if mask & selectors.EVENT_WRITE and writer is not None:
             if writer._cancelled:
                 self.remove_writer(fileobj)
             else:
                 self._logger.debug("Invoking writer callback: %s", writer)
-                writer._run()
+                self._run_handle(writer)
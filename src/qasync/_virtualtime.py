@@ -0,0 +1,97 @@
+"""
+Event loop with a virtual clock, for fast and deterministic tests.
+
+BSD License
+"""
+
+import heapq
+import itertools
+
+from . import QEventLoop
+from ._common import with_logger
+
+
+@with_logger
+class VirtualTimeQEventLoop(QEventLoop):
+    """
+    QEventLoop whose clock only advances when the loop would otherwise wait.
+
+    time() starts at `start` and stands still while callbacks are running. Once
+    there are neither ready callbacks nor pending Qt events, the clock jumps
+    straight to the next scheduled deadline, so code sleeping or waiting on
+    timeouts of many seconds completes in milliseconds. Qt events are still
+    processed as usual, and always before the clock moves on.
+
+    Note that waiting for real I/O, subprocesses or threads does not hold the
+    clock back: a pending timeout expires as soon as the loop is idle. Pass
+    autojump=False and move the clock with advance() to control it manually.
+
+    >>> loop = VirtualTimeQEventLoop(app)  # doctest: +SKIP
+    >>> loop.run_until_complete(asyncio.sleep(3600))  # doctest: +SKIP
+    >>> loop.time()  # doctest: +SKIP
+    3600.0
+    """
+
+    def __init__(self, *args, start=0.0, autojump=True, **kwargs):
+        self.__now = start
+        self.__autojump = autojump
+        # (deadline, sequence number, handle), the sequence keeps callbacks
+        # with the same deadline in scheduling order
+        self.__scheduled = []
+        self.__sequence = itertools.count()
+        self.__jump_handle = None
+        super().__init__(*args, **kwargs)
+
+    def time(self):
+        return self.__now
+
+    def _add_callback(self, handle, delay=0, timer_type=None, tolerance=None):
+        if delay <= 0:
+            return self._timer.add_ready(handle)
+        heapq.heappush(
+            self.__scheduled, (self.__now + delay, next(self.__sequence), handle)
+        )
+        self.__schedule_jump()
+        return handle
+
+    def next_deadline(self):
+        """Return the time of the earliest scheduled callback, or None."""
+        scheduled = self.__scheduled
+        while scheduled and scheduled[0][2]._cancelled:
+            heapq.heappop(scheduled)
+        return scheduled[0][0] if scheduled else None
+
+    def advance(self, seconds):
+        """Move the clock forward, making the callbacks due by then ready."""
+        if seconds < 0:
+            raise ValueError("time cannot go backwards")
+        self.__now += seconds
+        self.__release_due()
+
+    def __schedule_jump(self):
+        if self.__autojump and self.__jump_handle is None:
+            self.__jump_handle = self.call_idle(self.__jump)
+
+    def __jump(self):
+        self.__jump_handle = None
+        deadline = self.next_deadline()
+        if deadline is None:
+            return
+        if deadline > self.__now:
+            self._logger.debug("Jumping from %s to %s", self.__now, deadline)
+            self.__now = deadline
+        self.__release_due()
+        if self.__scheduled:
+            self.__schedule_jump()
+
+    def __release_due(self):
+        scheduled = self.__scheduled
+        now = self.__now
+        while scheduled and scheduled[0][0] <= now:
+            handle = heapq.heappop(scheduled)[2]
+            if not handle._cancelled:
+                self._timer.add_ready(handle)
+
+    def close(self):
+        self.__scheduled.clear()
+        super().close()
@@ -0,0 +1,148 @@
+"""
+Detection of event loop stalls from a separate thread.
+
+BSD License
+"""
+
+import collections
+import sys
+import threading
+import time
+import traceback
+
+from ._common import with_logger
+
+_Stall = collections.namedtuple("_Stall", ["lag", "stack"])
+
+
+@with_logger
+class LoopWatchdog:
+    """
+    Measure the lag of an event loop and capture its stack while it is blocked.
+
+    A watchdog thread pings the loop with `call_soon_threadsafe` every `interval`
+    seconds and measures how long the ping takes to be handled. When that takes
+    longer than `threshold` seconds, the Python stack of the loop's thread is
+    sampled while it is still blocked. Once the loop responds, the stall is
+    recorded and passed to `on_stall(watchdog, stall)`, which by default logs a
+    warning. Note that `on_stall` runs in the watchdog thread.
+
+    >>> with LoopWatchdog(loop, threshold=0.2) as watchdog:  # doctest: +SKIP
+    ...     loop.run_until_complete(main())
+    >>> watchdog.lag_percentiles()  # doctest: +SKIP
+    {50: 0.0003, 90: 0.0011, 99: 0.24}
+    """
+
+    def __init__(
+        self,
+        loop,
+        interval=0.1,
+        threshold=0.25,
+        on_stall=None,
+        max_samples=1024,
+        max_stalls=32,
+    ):
+        self.__loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        self.__on_stall = on_stall or self.__log_stall
+        self.__lags = collections.deque(maxlen=max_samples)
+        self.__stalls = collections.deque(maxlen=max_stalls)
+        # recorded by the first ping, the watchdog may be created in any thread
+        self.__loop_thread = None
+        self.__stopping = threading.Event()
+        self.__thread = None
+
+    @property
+    def stalls(self):
+        """The most recent stalls, oldest first."""
+        return list(self.__stalls)
+
+    @property
+    def lags(self):
+        """The most recent lag measurements in seconds, oldest first."""
+        return list(self.__lags)
+
+    def lag_percentiles(self, percentiles=(50, 90, 99)):
+        """Return the given percentiles of the recent lag measurements."""
+        lags = sorted(self.__lags)
+        if not lags:
+            return {p: None for p in percentiles}
+        return {
+            p: lags[min(len(lags) - 1, int(len(lags) * p / 100))] for p in percentiles
+        }
+
+    def start(self):
+        if self.__thread is not None:
+            raise RuntimeError("LoopWatchdog is already running")
+        self.__stopping.clear()
+        self.__thread = threading.Thread(
+            target=self.__run, name="qasync-watchdog", daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self):
+        thread, self.__thread = self.__thread, None
+        if thread is not None:
+            self.__stopping.set()
+            thread.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __pong(self, event):
+        self.__loop_thread = threading.get_ident()
+        event.set()
+
+    def __run(self):
+        loop = self.__loop
+        while not self.__stopping.wait(self.interval):
+            if not loop.is_running():
+                continue
+
+            pong = threading.Event()
+            t0 = time.perf_counter()
+            try:
+                loop.call_soon_threadsafe(self.__pong, pong)
+            except RuntimeError:  # pragma: no cover
+                # loop has been closed
+                break
+
+            if pong.wait(self.threshold):
+                self.__lags.append(time.perf_counter() - t0)
+                continue
+
+            stack = self.__sample_stack()
+            while not pong.wait(self.interval):
+                if self.__stopping.is_set() or not loop.is_running():
+                    return
+            stall = _Stall(time.perf_counter() - t0, stack)
+            self.__lags.append(stall.lag)
+            self.__stalls.append(stall)
+            try:
+                self.__on_stall(self, stall)
+            except Exception:
+                self._logger.exception("Exception in stall handler")
+
+    def __sample_stack(self):
+        thread_id = self.__loop_thread
+        if thread_id is None:
+            # the first ping is still pending, running loops know their thread
+            thread_id = getattr(self.__loop, "_thread_id", None)
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            return ""
+        try:
+            return "".join(traceback.format_stack(frame))
+        finally:
+            del frame
+
+    @classmethod
+    def __log_stall(cls, watchdog, stall):
+        cls._logger.warning(
+            "Event loop was blocked for %.3f seconds in:\n%s", stall.lag, stall.stack
+        )
@@ -2,7 +2,9 @@
 BSD License
 """
 
-import importlib
+import importlib.machinery
+import importlib.util
+import subprocess
 import sys
 import types
 
@@ -19,14 +21,14 @@ def _purge_qt(mp: MonkeyPatch):
 
 
 def _stub_import(mp: MonkeyPatch, available=()):
-    """Patch importlib.import_module to only 'exist' for certain modules."""
+    """Patch importlib.util.find_spec to only 'find' certain modules."""
 
-    def fake_import(name):
+    def fake_find_spec(name):
         if name in available:
-            return types.ModuleType(name)
-        raise ImportError
+            return importlib.machinery.ModuleSpec(name, None)
+        return None
 
-    mp.setattr(importlib, "import_module", fake_import)
+    mp.setattr(importlib.util, "find_spec", fake_find_spec)
 
 
 def test_env_exact():
@@ -80,3 +82,14 @@ def test_env_overrides_imported():
         mp.setitem(sys.modules, "PyQt6", types.ModuleType("PyQt6"))
         mp.setenv("QT_API", "PySide2")
         assert _get_qt_flavor() == "PySide2"
+
+
+def test_qtwidgets_imported_lazily():
+    code = (
+        "import sys, qasync\n"
+        "widgets = qasync.qt_flavor + '.QtWidgets'\n"
+        "assert widgets not in sys.modules\n"
+        "assert qasync.QApplication is sys.modules[widgets].QApplication\n"
+        "assert qasync.QtWidgets is sys.modules[widgets]\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -5,6 +5,8 @@
 
 import asyncio
 import ctypes
+import importlib
+import json
 import logging
 import multiprocessing
 import os
@@ -24,7 +26,9 @@ from qasync import QtCore
 
 @pytest.fixture
 def loop(request, application):
-    lp = qasync.QEventLoop(application)
+    kwargs = dict(getattr(request, "param", {}))
+    loop_class = kwargs.pop("loop_class", qasync.QEventLoop)
+    lp = loop_class(application, **kwargs)
     asyncio.set_event_loop(lp)
 
     additional_exceptions = []
@@ -75,6 +79,12 @@ def executor(request):
     return exc
 
 
+# runs a test with the asyncio and the QProcess subprocess implementations
+subprocess_loops = pytest.mark.parametrize(
+    "loop", [{}, {"use_qprocess": True}], ids=["asyncio", "qprocess"], indirect=True
+)
+
+
 ExceptionTester = type(
     "ExceptionTester", (Exception,), {}
 )  # to make flake8 not complain
@@ -132,6 +142,7 @@ class TestCanRunTasksInExecutor:
         logging.debug("start blocking task()")
 
 
+@subprocess_loops
 def test_can_execute_subprocess(loop):
     """Verify that a subprocess can be executed."""
 
@@ -145,6 +156,7 @@ def test_can_execute_subprocess(loop):
     loop.run_until_complete(asyncio.wait_for(mycoro(), timeout=10.0))
 
 
+@subprocess_loops
 def test_can_read_subprocess(loop):
     """Verify that a subprocess's data can be read from stdout."""
 
@@ -165,6 +177,7 @@ def test_can_read_subprocess(loop):
     loop.run_until_complete(asyncio.wait_for(mycoro(), timeout=10.0))
 
 
+@subprocess_loops
 def test_can_communicate_subprocess(loop):
     """Verify that a subprocess's data can be passed in/out via stdin/stdout."""
 
@@ -186,6 +199,7 @@ def test_can_communicate_subprocess(loop):
     loop.run_until_complete(asyncio.wait_for(mycoro(), timeout=10.0))
 
 
+@subprocess_loops
 def test_can_terminate_subprocess(loop):
     """Verify that a subprocess can be terminated."""
 
@@ -1084,6 +1098,955 @@ def test_qeventloop_in_qthread(qtparent):
     thread.join()  # Ensure thread cleanup
 
 
+def test_signal_stream(loop):
+    async def main():
+        sig = qasync._make_signaller(qasync.QtCore, int, str)
+        async with qasync.signal_stream(sig.signal, maxsize=2) as stream:
+            sig.signal.emit(1, "a")
+            sig.signal.emit(2, "b")
+            sig.signal.emit(3, "c")
+            assert stream.dropped == 1
+            assert await stream.__anext__() == (2, "b")
+            assert await stream.__anext__() == (3, "c")
+
+            loop.call_soon(sig.signal.emit, 4, "d")
+            assert await asyncio.wait_for(stream.__anext__(), timeout=1.0) == (4, "d")
+
+        # disconnected once closed
+        sig.signal.emit(5, "e")
+        assert stream.closed
+        assert len(stream) == 0
+        assert [args async for args in stream] == []
+
+    loop.run_until_complete(main())
+
+
+def test_signal_stream_drop_newest(loop):
+    async def main():
+        sig = qasync._make_signaller(qasync.QtCore, int)
+        stream = qasync.signal_stream(sig.signal, maxsize=1, overflow="drop_newest")
+        for i in range(3):
+            sig.signal.emit(i)
+        assert stream.dropped == 2
+        stream.close()
+        assert [args async for args in stream] == [(0,)]
+
+        with pytest.raises(ValueError):
+            qasync.signal_stream(sig.signal, overflow="grow")
+
+    loop.run_until_complete(main())
+
+
+def test_signal_stream_block_from_thread(loop):
+    received = []
+
+    async def main():
+        sig = qasync._make_signaller(qasync.QtCore, int)
+        async with qasync.signal_stream(
+            sig.signal, maxsize=2, overflow="block"
+        ) as stream:
+            producer = threading.Thread(
+                target=lambda: [sig.signal.emit(i) for i in range(20)]
+            )
+            producer.start()
+            async for (value,) in stream:
+                received.append(value)
+                if value == 19:
+                    break
+            await loop.run_in_executor(None, producer.join)
+            assert stream.dropped == 0
+
+    loop.run_until_complete(asyncio.wait_for(main(), timeout=5.0))
+    assert received == list(range(20))
+
+
+def test_wait_signal(loop):
+    async def main():
+        sig = qasync._make_signaller(qasync.QtCore, int)
+        loop.call_later(0.01, sig.signal.emit, 42)
+        assert await qasync.wait_signal(sig.signal, timeout=1.0) == (42,)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await qasync.wait_signal(sig.signal, timeout=0.01)
+
+    loop.run_until_complete(main())
+
+
+def test_task_scope_cancelled_on_destroyed(loop):
+    async def main():
+        owner = QtCore.QObject()
+        scope = qasync.task_scope(owner)
+        assert qasync.task_scope(owner) is scope
+
+        task = scope.create_task(asyncio.sleep(10))
+        await asyncio.sleep(0)
+        assert qasync.live_tasks()[owner] == [task]
+
+        owner.deleteLater()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(task, timeout=1.0)
+        assert scope.closed
+        assert owner not in qasync.live_tasks()
+
+        coro = asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            scope.create_task(coro)
+
+    loop.run_until_complete(main())
+
+
+def test_async_slot_receiver_outlives_loop(application):
+    ran = []
+
+    class Receiver(QtCore.QObject):
+        @qasync.asyncSlot()
+        async def work(self):
+            ran.append(asyncio.get_running_loop())
+
+    receiver = Receiver()
+    sig = qasync._make_signaller(qasync.QtCore)
+    sig.signal.connect(receiver.work)
+
+    loops = []
+    for _ in range(2):
+        lp = qasync.QEventLoop(application)
+        asyncio.set_event_loop(lp)
+        try:
+            lp.call_soon(sig.signal.emit)
+            lp.run_until_complete(asyncio.sleep(0.05))
+        finally:
+            lp.close()
+            asyncio.set_event_loop(None)
+        loops.append(lp)
+
+    # the slot ran on each loop, not on the first, closed one
+    assert ran == loops
+
+
+def test_async_slot_bound_to_receiver(loop):
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    class Receiver(QtCore.QObject):
+        @qasync.asyncSlot()
+        async def work(self):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    async def main():
+        receiver = Receiver()
+        sig = qasync._make_signaller(qasync.QtCore)
+        sig.signal.connect(receiver.work)
+        sig.signal.emit()
+        await asyncio.wait_for(started.wait(), timeout=1.0)
+
+        (task,) = qasync.live_tasks()[receiver]
+        assert task.get_name() == Receiver.work.__qualname__
+
+        receiver.deleteLater()
+        await asyncio.wait_for(cancelled.wait(), timeout=1.0)
+
+    loop.run_until_complete(main())
+
+
+@pytest.mark.parametrize("loop", [{"max_batch_time": 0.005}], indirect=True)
+def test_max_batch_time(loop):
+    order = []
+
+    def busy(i):
+        order.append(i)
+        time.sleep(0.002)
+
+    for i in range(20):
+        loop.call_soon(busy, i)
+    loop.run_until_complete(asyncio.sleep(0.05))
+
+    assert order == list(range(20))
+    stats = loop.get_batch_stats()
+    assert stats["budget_exceeded"] >= 5
+    assert stats["batches"] > stats["budget_exceeded"]
+
+
+def test_nested_event_loop_in_callback(loop):
+    ticks = []
+    after = []
+
+    def nested():
+        event_loop = QtCore.QEventLoop()
+        QtCore.QTimer.singleShot(300, event_loop.quit)
+        if hasattr(event_loop, "exec"):
+            event_loop.exec()
+        else:
+            event_loop.exec_()
+
+    async def ticker():
+        for _ in range(5):
+            await asyncio.sleep(0.02)
+            ticks.append(loop.time() - start)
+
+    start = loop.time()
+    task = loop.create_task(ticker())
+    loop.call_soon(nested)
+    # queued behind the nested loop in the same batch
+    loop.call_soon(lambda: after.append(loop.time() - start))
+    loop.run_until_complete(asyncio.sleep(0.4))
+
+    assert task.done()
+    assert len(ticks) == 5
+    assert ticks[-1] < 0.25
+    assert after[0] < 0.25
+
+
+def test_call_idle(loop):
+    order = []
+
+    async def main():
+        loop.call_idle(order.append, "idle")
+        cancelled = loop.call_idle(order.append, "cancelled")
+        cancelled.cancel()
+        for i in range(3):
+            loop.call_soon(order.append, i)
+        await qasync.idle()
+        order.append("awaited")
+
+    loop.run_until_complete(asyncio.wait_for(main(), timeout=1.0))
+    assert order == [0, 1, 2, "idle", "awaited"]
+
+    with pytest.raises(TypeError, match="coroutines cannot be used with call_idle"):
+        loop.call_idle(main)
+    with pytest.raises(TypeError, match="callback must be callable: int"):
+        loop.call_idle(1)
+
+
+def test_call_idle_yields_to_callbacks(loop):
+    order = []
+
+    def idle_work(i):
+        order.append(("idle", i))
+        loop.call_soon(order.append, ("soon", i))
+
+    async def main():
+        for i in range(3):
+            loop.call_idle(idle_work, i)
+        for _ in range(3):
+            await qasync.idle()
+
+    loop.run_until_complete(asyncio.wait_for(main(), timeout=1.0))
+    # callbacks scheduled by idle work run before the next idle callback
+    assert order[:4] == [("idle", 0), ("soon", 0), ("idle", 1), ("soon", 1)]
+
+
+def test_sliced(loop):
+    ticks = 0
+
+    def tick():
+        nonlocal ticks
+        ticks += 1
+        loop.call_later(0.001, tick)
+
+    async def main():
+        tick()
+        items = []
+        chunks = 0
+        async for chunk in qasync.sliced(range(2000), budget=0.002):
+            chunks += 1
+            for item in chunk:
+                time.sleep(0.00001)
+                items.append(item)
+        return items, chunks
+
+    items, chunks = loop.run_until_complete(main())
+    assert items == list(range(2000))
+    # items are handed out in chunks and the loop kept running in between
+    assert chunks < 2000
+    assert ticks > 1
+
+
+def test_loop_watchdog(loop):
+    stalls = []
+
+    def blocking_callback():
+        time.sleep(0.3)
+
+    async def main():
+        await asyncio.sleep(0.05)
+        loop.call_soon(blocking_callback)
+        await asyncio.sleep(0.4)
+
+    with qasync.LoopWatchdog(
+        loop, interval=0.01, threshold=0.1, on_stall=lambda w, s: stalls.append(s)
+    ) as watchdog:
+        loop.run_until_complete(main())
+
+    assert watchdog.stalls == stalls
+    assert len(stalls) == 1
+    assert stalls[0].lag >= 0.1
+    assert "blocking_callback" in stalls[0].stack
+    percentiles = watchdog.lag_percentiles((50, 100))
+    assert percentiles[50] < 0.1
+    assert percentiles[100] == stalls[0].lag
+
+
+def test_loop_watchdog_created_in_other_thread(loop):
+    stalls = []
+
+    def blocking_callback():
+        time.sleep(0.3)
+
+    async def main():
+        # block before the watchdog's first ping is answered
+        blocking_callback()
+        await asyncio.sleep(0.1)
+
+    watchdogs = []
+    creator = threading.Thread(
+        target=lambda: watchdogs.append(
+            qasync.LoopWatchdog(
+                loop,
+                interval=0.01,
+                threshold=0.1,
+                on_stall=lambda w, s: stalls.append(s),
+            )
+        )
+    )
+    creator.start()
+    creator.join()
+
+    with watchdogs[0]:
+        loop.run_until_complete(main())
+
+    assert len(stalls) == 1
+    assert "blocking_callback" in stalls[0].stack
+
+
+def test_slow_callback_handler(loop, sock_pair):
+    slow = []
+    c_sock, s_sock = sock_pair
+
+    def handler(loop_, handle, duration):
+        assert loop_ is loop
+        assert duration >= 0.05
+        slow.append(handle._callback.__name__)
+
+    def slow_soon():
+        time.sleep(0.06)
+
+    def slow_later():
+        time.sleep(0.06)
+
+    def slow_threadsafe():
+        time.sleep(0.06)
+
+    def slow_reader():
+        s_sock.recv(1)
+        loop._remove_reader(s_sock.fileno())
+        time.sleep(0.06)
+        done.set_result(None)
+
+    def fast():
+        pass
+
+    done = asyncio.Future()
+    loop.set_slow_callback_handler(handler, threshold=0.05)
+    assert loop.get_slow_callback_handler() is handler
+    loop.call_soon(slow_soon)
+    loop.call_soon(fast)
+    loop.call_later(0.01, slow_later)
+    threading.Thread(target=loop.call_soon_threadsafe, args=(slow_threadsafe,)).start()
+    loop._add_reader(s_sock.fileno(), slow_reader)
+    c_sock.send(b"a")
+    loop.run_until_complete(asyncio.wait_for(done, timeout=1.0))
+    loop.run_until_complete(asyncio.sleep(0.05))
+
+    assert sorted(slow) == ["slow_later", "slow_reader", "slow_soon", "slow_threadsafe"]
+
+    loop.set_slow_callback_handler(None)
+    loop.call_soon(slow_soon)
+    loop.run_until_complete(asyncio.sleep(0))
+    assert len(slow) == 4
+
+
+def test_loop_tracer(loop, sock_pair, tmp_path):
+    c_sock, s_sock = sock_pair
+
+    def traced_callback():
+        pass
+
+    def traced_job():
+        return 1
+
+    async def traced_coro():
+        await asyncio.sleep(0.01)
+        with qasync.QThreadExecutor(1) as executor:
+            await loop.run_in_executor(executor, traced_job)
+        readable = loop.create_future()
+        loop._add_reader(s_sock.fileno(), readable.set_result, None)
+        c_sock.send(b"x")
+        await readable
+        loop._remove_reader(s_sock.fileno())
+        assert s_sock.recv(1) == b"x"
+        threading.Thread(
+            target=loop.call_soon_threadsafe, args=(traced_callback,)
+        ).start()
+        await asyncio.sleep(0.05)
+
+    with qasync.LoopTracer(capacity=4096) as tracer:
+        loop.call_soon(traced_callback)
+        loop.run_until_complete(traced_coro())
+    loop.call_soon(traced_callback)
+    loop.run_until_complete(asyncio.sleep(0))
+
+    events = tracer.events()
+    names = {(e.get("cat"), e["name"]) for e in events}
+    assert ("handle", "test_loop_tracer.<locals>.traced_callback") in names
+    assert ("handle", "test_loop_tracer.<locals>.traced_coro") in names
+    assert ("executor", "test_loop_tracer.<locals>.traced_job") in names
+    assert ("notifier", "read notifier") in names
+    assert ("timer", "timer") in names
+    assert ("wakeup", "call_soon_threadsafe") in names
+    assert ("batch", "ready batch") in names
+    assert "QThreadWorker #1" in {e["args"]["name"] for e in events if e["ph"] == "M"}
+    # nothing is recorded after the tracer stopped
+    assert sum(1 for e in events if "traced_callback" in e["name"]) == 2
+
+    path = tmp_path / "trace.json"
+    tracer.dump(str(path))
+    assert json.loads(path.read_text())["traceEvents"] == json.loads(json.dumps(events))
+
+
+def test_task_profile(loop):
+    async def busy():
+        for _ in range(3):
+            end = time.thread_time() + 0.02
+            while time.thread_time() < end:
+                pass
+            await asyncio.sleep(0)
+
+    async def lazy():
+        await asyncio.sleep(0.01)
+
+    @qasync.asyncSlot()
+    async def slot():
+        await busy()
+
+    async def main():
+        sig = qasync._make_signaller(qasync.QtCore)
+        sig.signal.connect(slot)
+        sig.signal.emit()
+        await asyncio.gather(
+            loop.create_task(busy(), name="busy-1"),
+            loop.create_task(busy(), name="busy-2"),
+            loop.create_task(lazy(), name="lazy"),
+        )
+        while qasync.background_tasks:
+            await asyncio.sleep(0.01)
+
+    assert loop.task_profile() == []
+    loop.set_task_accounting(True)
+    loop.run_until_complete(main())
+    loop.set_task_accounting(False)
+    loop.run_until_complete(busy())
+
+    profile = {entry.name: entry for entry in loop.task_profile()}
+    # tasks sharing a coroutine function are listed separately
+    for name in ("busy-1", "busy-2"):
+        busy_entry = profile[f"{name} (test_task_profile.<locals>.busy)"]
+        assert busy_entry.runs == 4
+        assert busy_entry.cpu >= 0.05
+        assert busy_entry.wall >= busy_entry.cpu * 0.9
+    assert profile[slot.__qualname__].cpu >= 0.05
+    assert profile["lazy (test_task_profile.<locals>.lazy)"].cpu < 0.05
+    assert loop.task_profile(limit=2)[0].cpu >= loop.task_profile(limit=2)[1].cpu
+
+
+@pytest.mark.parametrize("loop", [{"timer_type": "precise"}], indirect=True)
+def test_timer_type(loop):
+    precise = getattr(QtCore.Qt, "TimerType", QtCore.Qt).PreciseTimer
+    with mock.patch.object(
+        loop._timer, "startTimer", wraps=loop._timer.startTimer
+    ) as start_timer:
+        scheduled = loop.time() + 0.0101
+        fired = []
+        loop.call_later(0.0101, lambda: fired.append(loop.time()))
+        loop.call_at(scheduled, lambda: fired.append(loop.time()))
+        loop.call_later(0.001, lambda: None, timer_type="very_coarse")
+        loop.run_until_complete(asyncio.sleep(0.02))
+
+    # delays are rounded up, so timers do not fire before their deadline
+    assert start_timer.call_args_list[0] == mock.call(11, precise)
+    assert start_timer.call_args_list[2][0][1] != precise
+    assert len(fired) == 2
+    assert all(t >= scheduled for t in fired)
+    # float noise does not add a millisecond
+    assert 0.1 * 3 * 1000 > 300
+    assert qasync._ceil(0.1 * 3 * 1000) == 300
+
+    with pytest.raises(ValueError):
+        loop.call_later(0.1, lambda: None, timer_type="sloppy")
+
+
+@pytest.mark.parametrize("loop", [{"timer_slack": 0.05}], indirect=True)
+def test_timer_slack(loop):
+    fired = []
+
+    def record(name):
+        fired.append((name, loop.time()))
+
+    start = loop.time()
+    for i in range(10):
+        loop.call_later(0.003 * i + 0.001, record, i)
+    cancelled = loop.call_later(0.01, record, "cancelled")
+    cancelled.cancel()
+    loop.call_later(0.001, record, "exact", tolerance=0)
+    loop.run_until_complete(asyncio.sleep(0.12))
+
+    names = [name for name, _ in fired]
+    assert names[0] == "exact"
+    assert names[1:] == list(range(10))
+    # callbacks never run early, and late by at most the slack
+    for i, t in fired[1:]:
+        assert start + 0.003 * i + 0.001 <= t <= start + 0.003 * i + 0.08
+    # the ten callbacks, the cancelled one and the sleep share few wakeups
+    assert loop.get_batch_stats()["timer_wakeups"] <= 4
+
+    with pytest.raises(ValueError):
+        loop.call_later(0.1, record, None, tolerance=-1)
+
+
+def test_yield_now(loop):
+    order = []
+
+    async def worker(name):
+        for i in range(3):
+            order.append((name, i))
+            await qasync.yield_now()
+
+    async def main():
+        await asyncio.gather(worker("a"), worker("b"))
+
+    with mock.patch.object(
+        loop._timer, "startTimer", wraps=loop._timer.startTimer
+    ) as start_timer:
+        loop.run_until_complete(main())
+
+    # the workers take turns, and resuming them does not start timers
+    assert order == [("a", 0), ("b", 0), ("a", 1), ("b", 1), ("a", 2), ("b", 2)]
+    assert start_timer.call_count <= 2
+    # C callables are only inspected once, and still checked for being callable
+    loop.call_soon(len, ())
+    loop.call_soon(len, ())
+    assert type(len) in qasync._plain_callables
+    with pytest.raises(TypeError):
+        loop.call_soon(3)
+
+
+@pytest.mark.parametrize(
+    "loop", [{"loop_class": qasync.VirtualTimeQEventLoop}], indirect=True
+)
+def test_virtual_time(loop):
+    fired = []
+    received = []
+    sig = qasync._make_signaller(qasync.QtCore, object)
+    sig.signal.connect(received.append)
+
+    async def main():
+        t0 = time.perf_counter()
+        loop.call_later(20, fired.append, 20)
+        cancelled = loop.call_later(5, fired.append, 5)
+        cancelled.cancel()
+        await asyncio.sleep(10)
+        assert loop.time() == 10
+        sig.signal.emit("qt")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(loop.create_future(), 60)
+        return time.perf_counter() - t0
+
+    elapsed = loop.run_until_complete(main())
+    assert loop.time() == 70
+    assert fired == [20]
+    assert received == ["qt"]
+    assert elapsed < 1
+
+
+@pytest.mark.parametrize(
+    "loop",
+    [{"loop_class": qasync.VirtualTimeQEventLoop, "start": 5, "autojump": False}],
+    indirect=True,
+)
+def test_virtual_time_manual(loop):
+    fired = []
+    loop.call_later(1, fired.append, 6)
+    assert loop.next_deadline() == 6
+    loop.advance(1)
+    loop.run_until_complete(asyncio.sleep(0))
+    assert fired == [6]
+
+
+def test_callback_checks(loop):
+    class Receiver:
+        async def coro_method(self):
+            pass
+
+        def method(self):
+            pass
+
+    receiver = Receiver()
+    with pytest.raises(TypeError):
+        loop.call_soon(receiver.coro_method)
+    with pytest.raises(TypeError):
+        loop.call_later(0.1, receiver.coro_method)
+    with pytest.raises(TypeError):
+        loop.call_soon_threadsafe(receiver.coro_method)
+    with pytest.raises(TypeError):
+        loop.call_soon_threadsafe(None)
+    loop.call_soon(receiver.method)
+    loop.call_soon_threadsafe(receiver.method)
+    loop.run_until_complete(asyncio.sleep(0.01))
+
+
+@subprocess_loops
+def test_subprocess_streams(loop):
+    qprocess = loop._QEventLoop__use_qprocess
+
+    async def mycoro():
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.write(sys.stdin.read().upper());"
+            "sys.stderr.write('oops'); sys.exit(3)",
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        assert isinstance(process._transport, qasync._process.QProcessTransport) == (
+            qprocess
+        )
+        stdout, stderr = await process.communicate(b"x" * 2**20)
+        assert (stdout, stderr, process.returncode) == (b"X" * 2**20, b"oops", 3)
+
+        process = await asyncio.create_subprocess_shell(
+            "echo %QASYNC_TEST%" if os.name == "nt" else "echo $QASYNC_TEST",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env={**os.environ, "QASYNC_TEST": "hi"},
+        )
+        assert (await process.stdout.read()).strip() == b"hi"
+        assert await process.wait() == 0
+
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", "pass", stdin=subprocess.PIPE
+        )
+        assert await process.wait() == 0
+        # the transports can still be queried once the process exited
+        await asyncio.sleep(0.05)
+        assert process.stdin.transport.get_write_buffer_size() == 0
+        if qprocess:
+            assert process._transport.get_extra_info("subprocess") is None
+        process.stdin.close()
+
+        with pytest.raises(FileNotFoundError):
+            await asyncio.create_subprocess_exec("qasync-does-not-exist")
+
+        # not supported by QProcess, so asyncio takes over
+        with open(os.devnull, "wb") as devnull:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-c", "print(1)", stdout=devnull
+            )
+            assert not isinstance(process._transport, qasync._process.QProcessTransport)
+            assert await process.wait() == 0
+
+    loop.run_until_complete(asyncio.wait_for(mycoro(), timeout=10.0))
+
+
+@pytest.mark.skipif(os.name == "nt", reason="readers of the proactor loop")
+def test_read_draining(loop, sock_pair):
+    client_sock, srv_sock = sock_pair
+    srv_sock.setblocking(False)
+
+    def read_all(budget):
+        ticks = [0]
+        seen = []
+
+        def tick():
+            ticks[0] += 1
+            ticker[0] = loop.call_soon(tick)
+
+        def on_readable():
+            srv_sock.recv(10)
+            seen.append(ticks[0])
+            if len(seen) == 100:
+                loop.remove_reader(srv_sock.fileno())
+                done.set_result(None)
+
+        done = loop.create_future()
+        ticker = [loop.call_soon(tick)]
+        loop.set_read_draining(budget is not None, *(budget or ()))
+        client_sock.sendall(b"x" * 1000)
+        loop.add_reader(srv_sock.fileno(), on_readable)
+        loop.run_until_complete(asyncio.wait_for(done, 5))
+        ticker[0].cancel()
+        # number of activations the reads were spread over
+        return len(set(seen))
+
+    assert read_all(None) > 1
+    assert read_all((1 << 20, 1.0)) == 1
+    # the byte budget ends the drain early
+    assert read_all((500, 1.0)) > 1
+
+
+@pytest.mark.skipif(os.name == "nt", reason="the proactor loop reads datagrams")
+@pytest.mark.parametrize("loop", [{"datagram_batch": 4}], indirect=True)
+def test_datagram_batch(loop):
+    class Batched(asyncio.DatagramProtocol):
+        def __init__(self):
+            self.batches = []
+
+        def datagrams_received(self, datagrams):
+            self.batches.append([data for data, addr in datagrams])
+
+    class Single(asyncio.DatagramProtocol):
+        def __init__(self):
+            self.received = []
+
+        def datagram_received(self, data, addr):
+            self.received.append(data)
+            if len(self.received) == 5:
+                transport.close()
+
+    async def receive(protocol):
+        nonlocal transport
+        send_sock, recv_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        with send_sock:
+            for i in range(10):
+                send_sock.send(b"%d" % i)
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: protocol, sock=recv_sock
+            )
+            await asyncio.sleep(0.05)
+            transport.close()
+
+    transport = None
+    batched = Batched()
+    loop.run_until_complete(receive(batched))
+    assert [len(batch) for batch in batched.batches] == [4, 4, 2]
+    assert sum(batched.batches, []) == [b"%d" % i for i in range(10)]
+
+    # datagrams after closing the transport are not delivered
+    single = Single()
+    loop.run_until_complete(receive(single))
+    assert single.received == [b"%d" % i for i in range(5)]
+
+
+def test_buffer_pool(loop, sock_pair):
+    pool = qasync.BufferPool(16, count=1)
+    first, second = pool.acquire(), pool.acquire()
+    assert len(first) == len(second) == 16 and not first.readonly
+    pool.release(first)
+    pool.release(second)
+    # only `count` buffers are kept
+    assert len(pool) == 1
+    assert pool.acquire() is first
+    pool.release(first)
+
+    class Collect(qasync.PooledBufferedProtocol):
+        def __init__(self, pool):
+            super().__init__(pool)
+            self.chunks = []
+            self.closed = loop.create_future()
+
+        def data_received_into(self, view):
+            self.chunks.append(bytes(view))
+
+        def connection_lost(self, exc):
+            super().connection_lost(exc)
+            self.closed.set_result(None)
+
+    client_sock, srv_sock = sock_pair
+    protocol = Collect(pool)
+
+    async def receive():
+        await loop.connect_accepted_socket(lambda: protocol, srv_sock)
+        client_sock.sendall(b"x" * 40)
+        client_sock.close()
+        await protocol.closed
+
+    loop.run_until_complete(asyncio.wait_for(receive(), 5))
+    assert b"".join(protocol.chunks) == b"x" * 40
+    assert max(map(len, protocol.chunks)) <= 16
+    # the buffer went back to the pool
+    assert pool.acquire() is first
+
+
+def test_qt_buffers():
+    try:
+        pool = qasync.BufferPool(8, qbytearray=True)
+    except TypeError as exc:
+        if "does not support writing" not in str(exc):
+            raise
+        pytest.skip("QByteArray is not writable with this binding")
+    view = pool.acquire()
+    view[:3] = b"abc"
+    assert isinstance(view.obj, qasync.QtCore.QByteArray)
+    assert bytes(view.obj)[:3] == b"abc"
+
+    QtGui = importlib.import_module(f"{qasync.qt_flavor}.QtGui")
+    pixels = bytearray(4 * 4)
+    image = qasync.qimage_from_buffer(
+        pixels, 2, 2, 8, QtGui.QImage.Format.Format_RGBA8888
+    )
+    pixels[:4] = b"\x11\x22\x33\xff"
+    # the image shows the buffer contents without a copy
+    assert image.pixel(0, 0) == 0xFF112233
+
+
+def test_loop_pool(loop):
+    async def where(delay=0):
+        await asyncio.sleep(delay)
+        return asyncio.get_running_loop(), threading.get_ident()
+
+    with qasync.QLoopPool(2) as pool:
+        assert len(set(pool.loops)) == 2
+        results = [pool.submit(where()).result(5) for _ in range(4)]
+        # round robin alternates between the loops, each in its own thread
+        assert [result[0] for result in results] == pool.loops * 2
+        assert threading.get_ident() not in {ident for _, ident in results}
+
+        # awaitable from another loop
+        pool_loop, _ = loop.run_until_complete(
+            asyncio.wrap_future(pool.submit(where()))
+        )
+        assert pool_loop in pool.loops
+        hanging = pool.submit(asyncio.sleep(100))
+
+    assert hanging.cancelled()
+    assert all(pool_loop.is_closed() for pool_loop in pool.loops)
+    with pytest.raises(RuntimeError):
+        pool.submit(where())
+
+    with qasync.QLoopPool(2, placement="least_loaded") as pool:
+        busy = pool.submit(where(0.2))
+        assert sorted(pool.loads()) == [0, 1]
+        # both go to the idle loop while the other is busy
+        quick = [pool.submit(where()).result(5)[0] for _ in range(2)]
+        assert quick[0] is quick[1] is not busy.result(5)[0]
+
+    with pytest.raises(ValueError):
+        qasync.QLoopPool(2, placement="random")
+    with pytest.raises(TypeError):
+        qasync.QLoopPool(2, timer_tpye="precise")
+    # errors of the loops' constructors are raised instead of hanging
+    with pytest.raises(ValueError):
+        qasync.QLoopPool(2, timer_type="sloppy")
+
+
+def test_thread_safe_queue(loop):
+    queue = qasync.ThreadSafeQueue()
+
+    async def consume():
+        batch = await queue.get_batch()
+        # a burst put while the consumer waits costs a single wakeup
+        while len(batch) < 1000:
+            batch += await queue.get_batch()
+        return batch
+
+    def produce():
+        for i in range(1000):
+            queue.put_nowait(i)
+
+    consumer = asyncio.ensure_future(consume())
+    loop.run_until_complete(asyncio.sleep(0))
+    threading.Thread(target=produce).start()
+    assert loop.run_until_complete(asyncio.wait_for(consumer, 5)) == list(range(1000))
+    assert queue.wakeups < 1000
+    assert queue.empty()
+
+    # bounded queues push back on producers
+    queue = qasync.ThreadSafeQueue(maxsize=2)
+    queue.put_nowait(0)
+    queue.put_nowait(1)
+    assert queue.full()
+    with pytest.raises(asyncio.QueueFull):
+        queue.put_nowait(2)
+    with pytest.raises(asyncio.QueueFull):
+        queue.put(2, timeout=0.01)
+
+    blocked = threading.Thread(target=lambda: [queue.put(i) for i in (2, 3)])
+    blocked.start()
+
+    async def consume_bounded():
+        putter = asyncio.ensure_future(queue.put_async(4))
+        items = []
+        while len(items) < 5:
+            items.append(await asyncio.wait_for(queue.get(), 5))
+        await putter
+        return items
+
+    items = loop.run_until_complete(consume_bounded())
+    blocked.join()
+    assert sorted(items) == list(range(5))
+    assert queue.empty()
+    with pytest.raises(asyncio.QueueEmpty):
+        queue.get_nowait()
+
+
+@pytest.mark.parametrize(
+    "loop",
+    [{"threadsafe_wakeup": "signal"}, {"threadsafe_wakeup": "event"}],
+    ids=["signal", "event"],
+    indirect=True,
+)
+def test_threadsafe_wakeup(loop):
+    received = []
+
+    def produce(name):
+        for i in range(200):
+            loop.call_soon_threadsafe(received.append, (name, i))
+
+    async def main():
+        threads = [threading.Thread(target=produce, args=(name,)) for name in "abc"]
+        for thread in threads:
+            thread.start()
+        while len(received) < 600:
+            await asyncio.sleep(0.01)
+        for thread in threads:
+            thread.join()
+        # futures of other threads are delivered the same way
+        return await loop.run_in_executor(None, lambda: 42)
+
+    assert loop.run_until_complete(asyncio.wait_for(main(), 5)) == 42
+    for name in "abc":
+        assert [i for n, i in received if n == name] == list(range(200))
+
+
+@pytest.mark.parametrize("loop", [{"executor_workers": 1}], indirect=True)
+def test_executor_pools(loop):
+    release = threading.Event()
+
+    async def main():
+        blocked = loop.run_in_executor(None, release.wait, 5)
+        # the single worker of the default executor is busy
+        queued = loop.run_in_executor(None, threading.get_ident)
+        # name resolution and blocking I/O run in their own executor
+        info = await asyncio.wait_for(
+            loop.getaddrinfo("127.0.0.1", 80, type=socket.SOCK_STREAM), 5
+        )
+        io_thread = await asyncio.wait_for(
+            loop.run_in_io_executor(threading.get_ident), 5
+        )
+        assert not queued.done()
+        release.set()
+        assert await blocked
+        assert await queued != io_thread
+        return info
+
+    info = loop.run_until_complete(main())
+    assert info[0][4] == ("127.0.0.1", 80)
+
+
 def teardown_module(module):
     """
     Remove handlers from all loggers
@@ -1,4 +1,6 @@
 import asyncio
+import os
+import subprocess
 import sys
 from unittest.mock import ANY
 
@@ -103,3 +105,25 @@ def test_qasync_run(application):
     assert done
     assert loop.is_closed()
     assert not loop.is_running()
+
+
+def test_qasync_run_headless():
+    """Test that qasync.run() works with a QCoreApplication without a display"""
+    code = """if True:
+        import asyncio, sys
+        import qasync
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            await asyncio.sleep(0.01)
+            await loop.run_in_executor(None, int)
+            return type(qasync.QtCore.QCoreApplication.instance()).__name__
+
+        name = qasync.run(main(), app_class=qasync.QtCore.QCoreApplication)
+        assert name == "QCoreApplication", name
+        assert not any(m.endswith((".QtWidgets", ".QtGui")) for m in sys.modules)
+    """
+    env = {
+        k: v for k, v in os.environ.items() if k not in ("DISPLAY", "QT_QPA_PLATFORM")
+    }
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)